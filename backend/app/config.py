@@ -1,4 +1,6 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 class Settings(BaseSettings):
@@ -10,9 +12,18 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = "redis://localhost:6379"
     redis_password: Optional[str] = None
+    redis_max_connections: int = 50
+    redis_pool_timeout: int = 5  # seconds to wait for a free pooled connection
     
     # AI Services - Fixed to properly read from .env
     gemini_api_key: str = ""
+    gemini_max_concurrency: int = 4  # outbound Gemini calls in flight at once
+    gemini_requests_per_minute: int = 60  # request quota to pace calls to; 0 disables
+    gemini_tokens_per_minute: int = 0  # token quota to pace calls to; 0 disables
+    gemini_max_attempts: int = Field(4, ge=1)  # tries per request on 429/503/deadline errors and timeouts
+    gemini_request_timeout: float = 30.0  # seconds before one Gemini request is abandoned and retried
+    gemini_cache_size: int = 256  # cached responses for schema/analysis prompts
+    gemini_cache_ttl: int = 3600  # seconds
     google_cloud_project_id: Optional[str] = None
     
     # Vector Database
@@ -32,14 +43,28 @@ class Settings(BaseSettings):
     # API Settings
     api_v1_str: str = "/api"
     project_name: str = "DataGenesis AI"
+    # Local dev servers plus this project's own Vercel/Netlify deployments (incl. previews)
+    cors_origin_regex: str = r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$|^https://datagenesis[a-z0-9-]*\.(vercel|netlify)\.app$"
+    
+    # Server Settings
+    # More than one worker splits WebSocket clients and in-process caches across processes
+    server_workers: int = 1
+    server_limit_concurrency: int = 1000
+    server_backlog: int = 2048
+    threadpool_size: int = 100  # worker threads for sync endpoints and offloaded CPU work
     
     # Generation Settings
     max_concurrent_generations: int = 5
     max_dataset_size_mb: int = 100
     default_cache_ttl: int = 3600  # 1 hour
+    background_job_ttl: int = 600  # seconds a finished background job stays pollable
+    background_job_max_rows: int = 100_000  # generated rows kept in process across finished background jobs
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load settings from the environment once per process"""
+    return Settings()
 
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
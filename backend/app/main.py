@@ -1,167 +1,164 @@
-from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 import logging
 import sys
-import json
+import msgspec
+import orjson
+import anyio.to_thread
 import asyncio
-from datetime import datetime, timedelta
+import time
+from contextlib import asynccontextmanager
 from typing import Dict, Any, List
 import uuid
 
-# Configure logging properly
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+from .config import settings
+# Importing setup installs the queued logging configuration
+from .middleware.setup import configure
+
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize services on startup and clean up on shutdown"""
+    logger.info("🚀 Starting DataGenesis AI API...")
+    
+    # Sized for fallback generation offloaded from the event loop
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    
+    # Services are independent, so initialize them concurrently
+    results = await asyncio.gather(
+        gemini_service.initialize(),
+        orchestrator.initialize(),
+        return_exceptions=True
+    )
+    for service_name, result in zip(("gemini_service", "orchestrator"), results):
+        if isinstance(result, Exception):
+            logger.error("❌ %s failed to initialize: %s", service_name, result)
+    
+    # Log initialization status
+    gemini_status = await gemini_service.health_check()
+    logger.info("🤖 Gemini Status: %s", gemini_status)
+    
+    logger.info("🎯 DataGenesis AI API started successfully!")
+    
+    pruner = asyncio.create_task(_prune_generation_jobs_periodically())
+    try:
+        yield
+    finally:
+        logger.info("📴 Shutting down DataGenesis AI API...")
+        pruner.cancel()
+        logger.info("📴 DataGenesis AI API shutdown complete")
+
 # Initialize FastAPI app
 app = FastAPI(
     title="DataGenesis AI API",
     description="Enterprise-grade synthetic data generation platform",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
-)
-
-# Configure CORS - CRITICAL: Allow all origins for development
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for development
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    redoc_url="/api/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Import services
+from .utils.cache import ttl_cache
+from .utils.clock import utc_now_iso
+from .models.status import SystemStatus, encode_health_status, status_encoder
+from .models.websocket import MSGPACK_SUBPROTOCOL, Ping, client_message_decoder, msgpack_message_decoder
 from .services.gemini_service import GeminiService
 from .services.agent_orchestrator import AgentOrchestrator
 from .services.websocket_manager import ConnectionManager
 
 # Initialize services
 gemini_service = GeminiService()
-orchestrator = AgentOrchestrator()
+orchestrator = AgentOrchestrator(gemini_service)
 websocket_manager = ConnectionManager()
 
-# Optional authentication
-class OptionalHTTPBearer(HTTPBearer):
-    async def __call__(self, request: Request):
-        try:
-            return await super().__call__(request)
-        except HTTPException:
-            return None
+configure(app)
 
-security = OptionalHTTPBearer(auto_error=False)
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    logger.info("🚀 Starting DataGenesis AI API...")
-    await gemini_service.initialize()
-    await orchestrator.initialize()
-    
-    # Log initialization status
-    gemini_status = await gemini_service.health_check()
-    logger.info(f"🤖 Gemini Status: {gemini_status}")
-    
-    logger.info("🎯 DataGenesis AI API started successfully!")
-
-@app.on_event("shutdown") 
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    logger.info("📴 Shutting down DataGenesis AI API...")
-    logger.info("📴 DataGenesis AI API shutdown complete")
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = datetime.utcnow()
-    logger.info(f"🔗 {request.method} {request.url.path} - Starting request")
-    
-    response = await call_next(request)
-    
-    process_time = (datetime.utcnow() - start_time).total_seconds()
-    logger.info(f"✅ {request.method} {request.url.path} - {response.status_code} - {process_time:.3f}s")
-    
-    return response
-
-@app.get("/")
+@app.get("/", include_in_schema=False)
 async def root():
     """Root endpoint"""
-    return {
+    return ORJSONResponse({
         "message": "DataGenesis AI Backend",
         "version": "1.0.0",
         "status": "running",
         "api_docs": "/api/docs",
         "health": "/api/health"
-    }
+    })
 
-@app.get("/api/health")
-async def health_check():
+@app.get("/api/health", include_in_schema=False)
+async def health_check(no_cache: bool = False):
     """Health check endpoint - CRITICAL for frontend connection"""
-    logger.info("🏥 Health check requested")
-    
+    logger.debug("🏥 Health check requested")
+    return Response(await _health_status_body(no_cache=no_cache), media_type="application/json")
+
+@ttl_cache(seconds=2)
+async def _health_status_body(no_cache: bool = False) -> bytes:
+    """Encoded health status; the bytes are cached, never the Response"""
     # Check Gemini service health
-    gemini_status = await gemini_service.health_check()
+    gemini_status = await gemini_service.health_check(no_cache=no_cache)
     
-    health_status = {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0",
-        "environment": "development",
-        "host": "127.0.0.1:8000",
-        "message": "DataGenesis AI Backend is running successfully",
-        "services": {
+    body = encode_health_status(
+        timestamp=utc_now_iso(),
+        services={
             "gemini": gemini_status,
             "agents": "active",
             "websockets": "ready"
         }
-    }
+    )
     
-    logger.info(f"✅ Health check completed: {health_status}")
-    return health_status
+    logger.debug("✅ Health check completed: %s", body)
+    return body
 
-@app.options("/{full_path:path}")
-async def options_handler(full_path: str):
-    """Handle preflight OPTIONS requests"""
-    return JSONResponse(
-        content={"message": "OK"},
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-        }
-    )
+@app.get("/api/health/live", include_in_schema=False)
+async def liveness_check():
+    """Liveness probe - answers from local state without calling Gemini"""
+    return ORJSONResponse({
+        "status": "alive",
+        "timestamp": utc_now_iso(),
+        "gemini": gemini_service.health_check_light()
+    })
 
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """WebSocket endpoint for real-time updates"""
-    await websocket_manager.connect(websocket, client_id)
-    logger.info(f"🔌 WebSocket connected: {client_id}")
+    # JSON text frames by default; clients may opt into binary msgpack via the subprotocol
+    use_msgpack = MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    # ?batch=true coalesces bursts of updates into single "batch" frames
+    batch = websocket.query_params.get("batch", "").lower() in ("1", "true")
+    await websocket_manager.connect(websocket, client_id, MSGPACK_SUBPROTOCOL if use_msgpack else None, batch=batch)
+    logger.info("🔌 WebSocket connected: %s", client_id)
     
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            try:
+                if use_msgpack:
+                    message = msgpack_message_decoder.decode(await websocket.receive_bytes())
+                    is_ping = isinstance(message, Ping)
+                else:
+                    message = client_message_decoder.decode(await websocket.receive_text())
+                    is_ping = message.type == "ping"
+            except (msgspec.MsgspecError, KeyError, TypeError) as e:
+                # KeyError/TypeError: a text frame on the msgpack subprotocol or vice versa
+                logger.warning("⚠️ Ignoring malformed WebSocket message from %s: %s", client_id, e)
+                continue
             
             # Handle different message types
-            if message.get("type") == "ping":
+            if is_ping:
                 await websocket_manager.send_personal_message(
-                    json.dumps({"type": "pong", "timestamp": datetime.utcnow().isoformat()}),
+                    orjson.dumps({"type": "pong", "timestamp": utc_now_iso()}).decode(),
                     client_id
                 )
             
     except WebSocketDisconnect:
-        websocket_manager.disconnect(client_id)
-        logger.info(f"🔌 WebSocket disconnected: {client_id}")
+        logger.info("🔌 WebSocket disconnected: %s", client_id)
+    finally:
+        # No-op if this socket was already replaced by a newer connection under the same id
+        websocket_manager.disconnect(client_id, websocket)
 
 @app.post("/api/generation/schema-from-description")
-async def generate_schema_from_description(
-    request: dict,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-):
+async def generate_schema_from_description(request: dict):
     """Generate schema from natural language description using Gemini 2.0 Flash"""
     logger.info("🧠 AI-powered schema generation request received")
     
@@ -169,8 +166,8 @@ async def generate_schema_from_description(
     domain = request.get("domain", "general")
     data_type = request.get("data_type", "tabular")
     
-    logger.info(f"📝 Description: {description[:100]}...")
-    logger.info(f"🏭 Domain: {domain}, Type: {data_type}")
+    logger.info("📝 Description: %s...", description[:100])
+    logger.info("🏭 Domain: %s, Type: %s", domain, data_type)
     
     # Basic validation
     if not description or len(description.strip()) < 10:
@@ -183,24 +180,83 @@ async def generate_schema_from_description(
             description, domain, data_type
         )
         
-        logger.info(f"✅ Gemini 2.0 Flash generated schema with {len(schema_result.get('schema', {}))} fields")
+        logger.info("✅ Gemini 2.0 Flash generated schema with %s fields", len(schema_result.get('schema', {})))
         
-        return {
+        return ORJSONResponse({
             "schema": schema_result.get('schema', {}),
             "detected_domain": schema_result.get('detected_domain', domain),
             "estimated_rows": schema_result.get('estimated_rows', 10000),
             "suggestions": schema_result.get('suggestions', []),
             "sample_data": schema_result.get('sample_data', [])
-        }
+        })
         
     except Exception as e:
-        logger.error(f"❌ Schema generation error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Schema generation failed: {str(e)}")
+        logger.error("❌ Schema generation error: %s", e)
+        raise HTTPException(status_code=500, detail="Schema generation failed")
+
+# Records per chunk when streaming NDJSON - one send per chunk rather than per record
+NDJSON_CHUNK_ROWS = 256
+
+async def _ndjson_chunks(result: Dict[str, Any]):
+    """Yield generated records as NDJSON, followed by one line with everything but the data"""
+    data = result["data"]
+    for start in range(0, len(data), NDJSON_CHUNK_ROWS):
+        yield b"".join(orjson.dumps(row) + b"\n" for row in data[start:start + NDJSON_CHUNK_ROWS])
+    summary = {key: value for key, value in result.items() if key != "data"}
+    yield orjson.dumps(summary, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+
+# Background generation jobs, kept in process for polling (job_id -> status/result)
+generation_jobs: Dict[str, Dict[str, Any]] = {}
+# Seconds between sweeps of expired background jobs
+GENERATION_JOBS_PRUNE_INTERVAL = 60
+
+def _prune_generation_jobs():
+    """Forget expired finished jobs, then the oldest finished ones beyond the row budget"""
+    cutoff = time.monotonic() - settings.background_job_ttl
+    finished = sorted(
+        (job["finished_at"], job_id) for job_id, job in generation_jobs.items() if "finished_at" in job
+    )
+    rows = sum(len(generation_jobs[job_id].get("result", {}).get("data", ())) for _, job_id in finished)
+    for finished_at, job_id in finished:
+        if finished_at >= cutoff and rows <= settings.background_job_max_rows:
+            break
+        rows -= len(generation_jobs.pop(job_id).get("result", {}).get("data", ()))
+
+async def _prune_generation_jobs_periodically():
+    while True:
+        await asyncio.sleep(GENERATION_JOBS_PRUNE_INTERVAL)
+        _prune_generation_jobs()
+
+async def _run_generation_job(job_id: str, **generation_args):
+    """Run a generation in the background and record its outcome for polling"""
+    try:
+        result = await orchestrator.orchestrate_generation(
+            job_id=job_id, websocket_manager=websocket_manager, **generation_args
+        )
+        generation_jobs[job_id].update(status="completed", result=result)
+        logger.info("🎉 Background generation %s completed: %s rows", job_id, result['metadata']['rows_generated'])
+    except Exception as e:
+        generation_jobs[job_id].update(status="failed", error="Generation failed")
+        logger.error("❌ Background generation %s failed: %s", job_id, e)
+    finally:
+        generation_jobs[job_id]["finished_at"] = time.monotonic()
+        _prune_generation_jobs()
+
+@app.get("/api/generation/status/{job_id}")
+async def generation_status(job_id: str):
+    """Poll a background generation job"""
+    _prune_generation_jobs()
+    job = generation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown generation job")
+    return ORJSONResponse({key: value for key, value in job.items() if key != "finished_at"})
 
 @app.post("/api/generation/generate-local")
 async def generate_synthetic_data(
     request: dict,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    accept: str = Header("")
 ):
     """Generate high-quality synthetic data using multi-agent AI system"""
     logger.info("🚀 Multi-Agent AI Generation Request Received")
@@ -213,18 +269,37 @@ async def generate_synthetic_data(
     row_count = config.get('rowCount', 100)
     domain = config.get('domain', 'general')
     
-    logger.info(f"🎯 Starting AI-powered generation:")
-    logger.info(f"   📊 Rows: {row_count}")
-    logger.info(f"   🏭 Domain: {domain}")
-    logger.info(f"   📝 Schema fields: {len(schema)}")
-    logger.info(f"   🔍 Source data: {len(source_data)} records")
+    logger.info("🎯 Starting AI-powered generation:")
+    logger.info("   📊 Rows: %s", row_count)
+    logger.info("   🏭 Domain: %s", domain)
+    logger.info("   📝 Schema fields: %s", len(schema))
+    logger.info("   🔍 Source data: %s records", len(source_data))
     
     # Generate unique job ID for tracking
     job_id = str(uuid.uuid4())
     
+    # With ?background=true respond immediately; progress arrives over the
+    # WebSocket and the result is fetched from the status endpoint
+    if background:
+        _prune_generation_jobs()
+        generation_jobs[job_id] = {"job_id": job_id, "status": "running"}
+        background_tasks.add_task(
+            _run_generation_job,
+            job_id,
+            source_data=source_data,
+            schema=schema,
+            config=config,
+            description=description
+        )
+        logger.info("📋 Generation %s queued in background", job_id)
+        return ORJSONResponse(
+            {"job_id": job_id, "status": "running", "status_url": f"/api/generation/status/{job_id}"},
+            status_code=202
+        )
+    
     try:
         # Start the multi-agent orchestration process
-        logger.info(f"🤖 Initializing Multi-Agent Orchestra for job {job_id}")
+        logger.info("🤖 Initializing Multi-Agent Orchestra for job %s", job_id)
         
         result = await orchestrator.orchestrate_generation(
             job_id=job_id,
@@ -235,23 +310,25 @@ async def generate_synthetic_data(
             websocket_manager=websocket_manager
         )
         
-        logger.info(f"🎉 Multi-Agent generation completed successfully!")
-        logger.info(f"   ✅ Generated: {result['metadata']['rows_generated']} rows")
-        logger.info(f"   🏆 Quality Score: {result['quality_score']}%")
-        logger.info(f"   🔒 Privacy Score: {result['privacy_score']}%")
-        logger.info(f"   ⚖️ Bias Score: {result['bias_score']}%")
+        logger.info("🎉 Multi-Agent generation completed successfully!")
+        logger.info("   ✅ Generated: %s rows", result['metadata']['rows_generated'])
+        logger.info("   🏆 Quality Score: %s%%", result['quality_score'])
+        logger.info("   🔒 Privacy Score: %s%%", result['privacy_score'])
+        logger.info("   ⚖️ Bias Score: %s%%", result['bias_score'])
+        
+        # Clients that ask for NDJSON get records as they are encoded instead of one large body
+        if "application/x-ndjson" in accept:
+            return StreamingResponse(_ndjson_chunks(result), media_type="application/x-ndjson")
         
-        return result
+        # Largest payload in the API - encode it directly, skipping jsonable_encoder
+        return ORJSONResponse(result)
         
     except Exception as e:
-        logger.error(f"❌ Multi-agent generation failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+        logger.error("❌ Multi-agent generation failed: %s", e)
+        raise HTTPException(status_code=500, detail="Generation failed")
 
 @app.post("/api/generation/analyze")
-async def analyze_data(
-    request: dict,
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-):
+async def analyze_data(request: dict):
     """Analyze uploaded data using AI"""
     logger.info("🔍 AI-powered data analysis request received")
     
@@ -266,7 +343,7 @@ async def analyze_data(
         logger.info("🤖 Analyzing data with Gemini 2.0 Flash...")
         analysis = await gemini_service.analyze_data_comprehensive(sample_data, config)
         
-        logger.info(f"✅ Analysis completed: {analysis.get('domain', 'unknown')} domain detected")
+        logger.info("✅ Analysis completed: %s domain detected", analysis.get('domain', 'unknown'))
         
         return {
             "analysis": analysis,
@@ -274,8 +351,8 @@ async def analyze_data(
         }
         
     except Exception as e:
-        logger.error(f"❌ Data analysis error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        logger.error("❌ Data analysis error: %s", e)
+        raise HTTPException(status_code=500, detail="Analysis failed")
 
 @app.get("/api/agents/status")
 async def get_agents_status():
@@ -287,41 +364,58 @@ async def get_agents_status():
     logger.info("✅ Agent status retrieved")
     return status
 
-@app.get("/api/system/status")
-async def system_status(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@app.get("/api/system/status", include_in_schema=False)
+async def system_status(no_cache: bool = False):
     """Get real-time system status"""
     logger.info("📊 System status requested")
+    return Response(await _system_status_body(no_cache=no_cache), media_type="application/json")
+
+@ttl_cache(seconds=5)
+async def _system_status_body(no_cache: bool = False) -> bytes:
+    """Encoded system status; the bytes are cached, never the Response"""
+    # Get comprehensive system status - both probes run concurrently
+    gemini_status, agents_status = await asyncio.gather(
+        gemini_service.health_check(no_cache=no_cache),
+        orchestrator.get_agents_status(no_cache=no_cache),
+        return_exceptions=True
+    )
+    if isinstance(gemini_status, Exception):
+        logger.error("❌ Gemini status check failed", exc_info=gemini_status)
+        gemini_status = {"status": "error", "error": "Gemini status unavailable"}
+    if isinstance(agents_status, Exception):
+        logger.error("❌ Agent status check failed", exc_info=agents_status)
+        agents_status = {}
     
-    # Get comprehensive system status
-    gemini_status = await gemini_service.health_check()
-    agents_status = await orchestrator.get_agents_status()
-    
-    status = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "services": {
+    status = SystemStatus(
+        timestamp=utc_now_iso(),
+        services={
             "gemini_2_flash": gemini_status,
             "multi_agent_system": agents_status,
             "websockets": "active",
             "real_time_logging": "enabled"
         },
-        "performance_metrics": {
+        performance_metrics={
             "ai_processing": "optimal",
             "response_time": "< 100ms",
             "uptime": "99.9%"
         }
-    }
+    )
     
     logger.info("✅ System status compiled")
-    return status
-
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"❌ Unhandled exception in {request.method} {request.url.path}: {str(exc)}")
-    return JSONResponse(
-        status_code=500,
-        content={"error": "Internal server error", "detail": str(exc)}
-    )
+    return status_encoder.encode(status)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        "app.main:app",
+        host="127.0.0.1",
+        port=8000,
+        # uvloop has no Windows build; httptools parses HTTP in C everywhere
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # Deflate would re-compress every broadcast once per connection
+        ws_per_message_deflate=False,
+        workers=settings.server_workers,
+        limit_concurrency=settings.server_limit_concurrency,
+        backlog=settings.server_backlog
+    )
\ No newline at end of file
@@ -0,0 +1,70 @@
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import logging
+import queue
+import sys
+import time
+
+from ..config import settings
+
+# Configure logging properly - request coroutines only enqueue records,
+# a background listener thread performs the blocking stdout writes
+_log_queue: queue.Queue = queue.Queue(-1)
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+log_listener = QueueListener(_log_queue, _stream_handler)
+
+logging.basicConfig(
+    level=logging.INFO,
+    handlers=[_queue_handler]
+)
+# Drain the queue for as long as the handler is installed, whoever imports this module;
+# stopping at exit flushes the records still queued
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger(__name__)
+
+async def log_requests(request: Request, call_next):
+    start_time = time.perf_counter()
+    logger.debug("🔗 %s %s - Starting request", request.method, request.url.path)
+    
+    response = await call_next(request)
+    
+    process_time = time.perf_counter() - start_time
+    logger.info("✅ %s %s - %s - %.3fs", request.method, request.url.path, response.status_code, process_time)
+    
+    return response
+
+# Encoded once; each error still gets its own Response, since a Response is sent only once
+_INTERNAL_ERROR_BODY = b'{"error":"Internal server error"}'
+
+async def global_exception_handler(request: Request, exc: Exception):
+    # Runs in ServerErrorMiddleware, outside every other middleware. Details
+    # stay in the log; clients only get the generic body
+    logger.error("❌ Unhandled exception in %s %s: %s", request.method, request.url.path, exc, exc_info=exc)
+    return Response(_INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
+
+def configure(app: FastAPI):
+    """Install middleware and exception handlers on the app, once"""
+    app.middleware("http")(log_requests)
+    
+    # Configure CORS - local dev servers plus the project's own deployments.
+    # Auth travels in the Authorization header, never cookies, so credentialed
+    # (cookie) requests stay off for every origin the regex admits.
+    # Added last so it is the outermost middleware: preflights are answered
+    # before reaching request logging or the router.
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origin_regex=settings.cors_origin_regex,
+        allow_credentials=False,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # HTTPException and RequestValidationError keep FastAPI's built-in handlers
+    app.add_exception_handler(Exception, global_exception_handler)
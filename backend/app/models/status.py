@@ -0,0 +1,32 @@
+import msgspec
+from typing import Dict, Any
+
+class SystemStatus(msgspec.Struct):
+    timestamp: str
+    services: Dict[str, Any]
+    performance_metrics: Dict[str, str]
+
+# Reused across requests; msgspec specializes the encoding per Struct type
+status_encoder = msgspec.json.Encoder()
+
+# Health fields that never change after startup are encoded once; only the
+# timestamp and service statuses are spliced in per refresh
+_HEALTH_STATIC = status_encoder.encode({
+    "status": "healthy",
+    "version": "1.0.0",
+    "environment": "development",
+    "host": "127.0.0.1:8000",
+    "message": "DataGenesis AI Backend is running successfully"
+})
+_HEALTH_PREFIX = _HEALTH_STATIC[:-1] + b',"timestamp":'
+_HEALTH_SERVICES = b',"services":'
+
+def encode_health_status(timestamp: str, services: Dict[str, Any]) -> bytes:
+    """Encode the health payload around the prebuilt static fields"""
+    return b"".join((
+        _HEALTH_PREFIX,
+        status_encoder.encode(timestamp),
+        _HEALTH_SERVICES,
+        status_encoder.encode(services),
+        b"}"
+    ))
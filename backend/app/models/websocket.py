@@ -0,0 +1,16 @@
+import msgspec
+
+# Subprotocol a client requests to exchange binary msgpack frames instead of JSON text
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+class ClientMessage(msgspec.Struct):
+    """Inbound WebSocket message; only the type is needed for routing, other fields are ignored"""
+    type: str = ""
+
+class Ping(msgspec.Struct, tag="ping", tag_field="type"):
+    """Keep-alive from a msgpack client"""
+
+client_message_decoder = msgspec.json.Decoder(ClientMessage)
+# Tagged on "type"; further message structs join as a Union
+msgpack_message_decoder = msgspec.msgpack.Decoder(Ping)
+msgpack_encoder = msgspec.msgpack.Encoder()
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
 import uuid
 import asyncio
 import logging
@@ -97,18 +99,21 @@ def _generate_sample_data_from_schema(schema: Dict[str, Any], num_rows: int = 5)
     """Generate sample data from schema definition"""
     logger.info(f"📊 Generating {num_rows} sample rows from schema with {len(schema)} fields")
     
-    sample_data = []
+    # Date fields are offset from a single reference time rather than re-reading the clock per value
+    base_date = datetime.now() - timedelta(days=365)
+    fields = list(schema.items())
     
-    for i in range(num_rows):
-        row = {}
-        for field_name, field_info in schema.items():
-            row[field_name] = _generate_sample_value(field_info, field_name, i)
-        sample_data.append(row)
+    sample_data = [
+        {field_name: _generate_sample_value(field_info, field_name, i, base_date)
+         for field_name, field_info in fields}
+        for i in range(num_rows)
+    ]
     
     logger.info(f"✅ Generated sample data successfully")
     return sample_data
 
-def _generate_sample_value(field_info: Dict[str, Any], field_name: str, index: int):
+def _generate_sample_value(field_info: Dict[str, Any], field_name: str, index: int,
+                           base_date: Optional[datetime] = None):
     """Generate a realistic sample value based on field type and constraints"""
     field_type = field_info.get('type', 'string')
     constraints = field_info.get('constraints', {})
@@ -156,8 +161,7 @@ def _generate_sample_value(field_info: Dict[str, Any], field_name: str, index: i
     elif field_type == 'boolean':
         return index % 2 == 0
     elif field_type in ['date', 'datetime']:
-        from datetime import datetime, timedelta
-        base_date = datetime.now() - timedelta(days=365)
+        base_date = base_date or datetime.now() - timedelta(days=365)
         result_date = base_date + timedelta(days=index * 30)
         return result_date.isoformat() if field_type == 'datetime' else result_date.date().isoformat()
     elif field_type == 'email':
@@ -229,7 +233,7 @@ async def get_generation_status(
         pass
     
     # Get job status from Redis
-    job_data = await redis_service.get_cache(f"job:{job_id}")
+    job_data = await redis_service.get_generation_job(job_id)
     
     if not job_data:
         logger.warning(f"❌ Job not found: {job_id}")
@@ -280,7 +284,7 @@ async def cancel_generation_job(
     user = await verify_token(credentials.credentials)
     
     # Update job status
-    await redis_service.update_job_progress(job_id, -1, "cancelled")
+    await redis_service.report_job_progress(job_id, -1, "Job cancelled", status="cancelled")
     logger.info(f"✅ Job cancelled: {job_id}")
     
     return {"message": "Job cancelled successfully"}
@@ -303,19 +307,21 @@ async def analyze_data(
         pass
     
     try:
-        # Quick analysis using Gemini
-        analysis = await gemini_service.analyze_schema_advanced(
+        # Domain, privacy and bias analyses come back from one combined Gemini call
+        full_analysis = await gemini_service.run_full_analysis(
             data.get("sample_data", []),
-            data.get("config", {}),
-            []
+            data.get("config", {})
         )
+        analysis = full_analysis["analysis"]
         
         logger.info("✅ Data analysis completed")
         return {
             "analysis": analysis,
+            "privacy_assessment": full_analysis["privacy_assessment"],
+            "bias_analysis": full_analysis["bias_analysis"],
             "recommendations": {
                 "suggested_row_count": min(max(len(data.get("sample_data", [])) * 10, 1000), 100000),
-                "suggested_privacy_level": "high" if analysis.get("pii_detected") else "medium",
+                "suggested_privacy_level": "high" if full_analysis["privacy_assessment"].get("pii_detected") else "medium",
                 "estimated_generation_time": "2-5 minutes"
             }
         }
@@ -351,7 +357,7 @@ async def generate_local_data(
         
         logger.info(f"✅ Local generation completed: {len(synthetic_data)} rows")
         
-        return {
+        return ORJSONResponse({
             "data": synthetic_data,
             "metadata": {
                 "rowsGenerated": len(synthetic_data),
@@ -363,7 +369,7 @@ async def generate_local_data(
             "qualityScore": quality_score,
             "privacyScore": privacy_score,
             "biasScore": bias_score
-        }
+        })
         
     except Exception as e:
         logger.error(f"❌ Local generation failed: {str(e)}")
@@ -386,7 +392,9 @@ async def run_generation_job(job_id: str, user_id: str, config: Dict[str, Any]):
         result = await orchestrator.orchestrate_generation(
             job_id,
             config.get("source_data", []),
-            config
+            config.get("schema", {}),
+            config,
+            progress_reporter=lambda progress, message: redis_service.report_job_progress(job_id, progress, message)
         )
         
         logger.info(f"✅ Generation completed for job: {job_id}")
@@ -401,7 +409,7 @@ async def run_generation_job(job_id: str, user_id: str, config: Dict[str, Any]):
         
     except Exception as e:
         # Handle job failure
-        logger.error(f"❌ Generation job {job_id} failed: {str(e)}")
-        await redis_service.update_job_progress(job_id, -1, "failed")
+        logger.error("❌ Generation job %s failed: %s", job_id, e)
+        await redis_service.report_job_progress(job_id, -1, "Generation failed", status="failed")
         if not user_id.startswith("guest_") and not user_id == "anonymous":
-            await supabase_service.fail_generation_job(job_id, str(e))
\ No newline at end of file
+            await supabase_service.fail_generation_job(job_id, "Generation failed")
\ No newline at end of file
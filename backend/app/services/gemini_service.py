@@ -1,24 +1,207 @@
 import google.generativeai as genai
-from typing import List, Dict, Any, Optional
-import json
+from google.api_core import exceptions as google_exceptions
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable, AsyncIterator
+import orjson
+import json5
 import asyncio
+import copy
 from datetime import datetime, timedelta
 import uuid
 import logging
 import os
+import numpy as np
+import random
 import re
+from starlette.concurrency import run_in_threadpool
 from ..config import settings
+from ..utils.cache import TTLCache, ttl_cache
+from ..utils.concurrency import Coalescer, TokenBucket, digest
 
 logger = logging.getLogger(__name__)
 
+# Model every request goes to; part of the response cache key
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+
+# The health probe gets one short attempt, so it never holds a call slot or
+# rate-limit tokens through the full retry schedule
+HEALTH_CHECK_TIMEOUT = 5.0
+
+# Gemini errors worth retrying; anything else fails the call immediately
+TRANSIENT_GEMINI_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+# Structured-output mode: the model returns bare JSON (no fences or prose),
+# so the parsers' first orjson.loads attempt succeeds
+JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+# Bounds on the sample rows embedded in analysis prompts
+PROMPT_FIELD_MAX_CHARS = 200
+PROMPT_SAMPLE_MAX_BYTES = 8192
+
+# Async callback reporting (rows generated so far, rows requested) during batched generation
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+# Rounds of topping up rows dropped as repeats across batches: one model batch, then fallback rows
+TOP_UP_ATTEMPTS = 3
+
+# Above this many rows fallback data is built column-wise with NumPy instead of row by row
+VECTORIZED_FALLBACK_THRESHOLD = 1000
+
+# Privacy and bias assessments used when Gemini can't provide them; deep-copied
+# per use, since callers annotate the results they get
+FALLBACK_ASSESSMENTS = {
+    "privacy_assessment": {"privacy_score": 85, "risks": [], "recommendations": []},
+    "bias_analysis": {"bias_score": 88, "bias_types": [], "recommendations": []}
+}
+
+# Domain detection for the fallbacks: description keywords and exact field names
+HEALTHCARE_KEYWORDS = ("patient", "medical")
+FINANCE_KEYWORDS = ("finance", "transaction")
+HEALTHCARE_FIELD_NAMES = frozenset({"patient", "diagnosis", "treatment"})
+FINANCE_FIELD_NAMES = frozenset({"account", "transaction", "amount"})
+
+# Fallback schema fields per domain, built once at import; hand out deep copies only
+HEALTHCARE_FALLBACK_FIELDS = {
+    "patient_id": {"type": "string", "description": "Patient identifier", "examples": ["PT001", "PT002", "PT003"]},
+    "name": {"type": "string", "description": "Patient name", "examples": ["Ahmad Hassan", "Fatima Al-Zahra", "Omar Khalil"]},
+    "age": {"type": "number", "description": "Patient age", "constraints": {"min": 18, "max": 90}, "examples": [45, 32, 67]},
+    "gender": {"type": "string", "description": "Patient gender", "examples": ["Male", "Female"]},
+    "diagnosis": {"type": "string", "description": "Medical diagnosis", "examples": ["Hypertension", "Diabetes Type 2", "Asthma"]}
+}
+FINANCE_FALLBACK_FIELDS = {
+    "account_id": {"type": "string", "description": "Account identifier", "examples": ["ACC001", "ACC002", "ACC003"]},
+    "amount": {"type": "number", "description": "Transaction amount", "examples": [1500.50, 750.25, 2200.00]},
+    "currency": {"type": "string", "description": "Currency", "examples": ["USD", "EUR", "SAR"]},
+    "transaction_type": {"type": "string", "description": "Transaction type", "examples": ["credit", "debit", "transfer"]}
+}
+GENERAL_FALLBACK_FIELDS = {
+    "name": {"type": "string", "description": "Name", "examples": ["John Doe", "Jane Smith", "Alex Johnson"]},
+    "value": {"type": "number", "description": "Numeric value", "examples": [100, 200, 300]},
+    "category": {"type": "string", "description": "Category", "examples": ["A", "B", "C"]}
+}
+
+def _pick_fallback_fields(description: str, domain: str) -> Tuple[Dict[str, Any], str]:
+    """Choose the fallback field template for a description.
+    
+    Returns a deep copy, so callers may mutate the field definitions freely.
+    """
+    desc_lower = description.lower()
+    if domain == "healthcare" or any(keyword in desc_lower for keyword in HEALTHCARE_KEYWORDS):
+        fields, domain = HEALTHCARE_FALLBACK_FIELDS, "healthcare"
+    elif domain == "finance" or any(keyword in desc_lower for keyword in FINANCE_KEYWORDS):
+        fields, domain = FINANCE_FALLBACK_FIELDS, "finance"
+    else:
+        fields = GENERAL_FALLBACK_FIELDS
+    return copy.deepcopy(fields), domain
+
+def cycle_examples(examples: List[Any], index: np.ndarray) -> np.ndarray:
+    """examples[i % len(examples)] for every i in `index`, as a 1-D object array.
+    
+    Filled element by element: np.array() would turn equal-length list examples
+    (array-type fields) into a second dimension instead of keeping them as values.
+    """
+    values = np.empty(len(examples), dtype=object)
+    for i, example in enumerate(examples):
+        values[i] = example
+    return values[index % len(examples)]
+
+def isoformat_dates(dates: np.ndarray) -> np.ndarray:
+    """datetime.isoformat() for every datetime64 in `dates`: microseconds only where non-zero"""
+    whole_seconds = dates.astype('datetime64[s]') == dates
+    return np.where(
+        whole_seconds,
+        np.datetime_as_string(dates, unit='s'),
+        np.datetime_as_string(dates, unit='us')
+    )
+
+def _prompt_json(value: Any) -> str:
+    """Compact JSON for embedding in a prompt (orjson handles datetimes/UUIDs/numpy natively).
+    
+    No indentation: the model reads minified JSON just as well and every
+    whitespace token adds to prefill time and input cost.
+    """
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+def _prompt_sample(data: List[Dict[str, Any]], max_rows: int) -> str:
+    """Compact JSON of up to `max_rows` sample rows, bounded in size.
+    
+    Long strings are cut to PROMPT_FIELD_MAX_CHARS, and rows stop being added
+    once the sample would exceed PROMPT_SAMPLE_MAX_BYTES (the first row is
+    always kept). The caller's rows are never modified.
+    """
+    encoded_rows = []
+    total = 2  # the enclosing brackets
+    for row in (data or [])[:max_rows]:
+        if isinstance(row, dict):
+            row = {
+                field: value[:PROMPT_FIELD_MAX_CHARS] if isinstance(value, str) else value
+                for field, value in row.items()
+            }
+        encoded = _prompt_json(row)
+        if encoded_rows and total + len(encoded) + 1 > PROMPT_SAMPLE_MAX_BYTES:
+            break
+        encoded_rows.append(encoded)
+        total += len(encoded) + 1
+    return "[" + ",".join(encoded_rows) + "]"
+
+# First fenced code block in a model response, with or without a json language tag
+FENCED_BLOCK_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.S)
+
+# Repairs for common model JSON mistakes, applied by _fix_common_json_errors
+TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+SINGLE_QUOTED_KEY_RE = re.compile(r"'([^']*)':")
+SINGLE_QUOTED_VALUE_RE = re.compile(r":\s*'([^']*)'")
+LINE_COMMENT_RE = re.compile(r'//.*?\n')
+BLOCK_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+ADJACENT_OBJECTS_RE = re.compile(r'}\s*{')
+
+def _extract_json(text: str, array: bool = False) -> str:
+    """Slice the JSON out of a model response: inside any code fence, from the
+    first opening bracket to the last closing one (only [ ] when `array`)."""
+    match = FENCED_BLOCK_RE.search(text)
+    if match:
+        text = match.group(1)
+    
+    if array:
+        start, end = text.find('['), text.rfind(']')
+    else:
+        starts = [i for i in (text.find('['), text.find('{')) if i != -1]
+        start = min(starts) if starts else -1
+        end = max(text.rfind(']'), text.rfind('}'))
+    
+    if start != -1 and end > start:
+        return text[start:end + 1]
+    return text.strip()
+
+def _compact_prompt(prompt: str) -> str:
+    """Drop the source-code indentation and blank lines the prompt templates carry"""
+    return "\n".join(line.strip() for line in prompt.strip().splitlines() if line.strip())
+
 class GeminiService:
     def __init__(self):
         self.model = None
         self.is_initialized = False
         self.api_key = None
+        self.coalescer = Coalescer(settings.gemini_max_concurrency)
+        self.init_lock = asyncio.Lock()
+        # Pace calls to the API quota instead of running into 429s; 0 disables a limit
+        self.request_bucket = TokenBucket(settings.gemini_requests_per_minute) if settings.gemini_requests_per_minute else None
+        self.token_bucket = TokenBucket(settings.gemini_tokens_per_minute) if settings.gemini_tokens_per_minute else None
+        # Responses to coalesced (deterministic-intent) prompts, keyed by prompt hash
+        self.response_cache = TTLCache(settings.gemini_cache_size, settings.gemini_cache_ttl)
         
     async def initialize(self):
-        """Initialize Gemini 2.0 Flash"""
+        """Initialize Gemini 2.0 Flash; callers sharing the service initialize it only once"""
+        async with self.init_lock:
+            if not self.is_initialized:
+                await self._initialize()
+    
+    async def _initialize(self):
         try:
             # Get API key from multiple sources
             self.api_key = (
@@ -42,7 +225,7 @@ class GeminiService:
             
             logger.info("🤖 Initializing Gemini 2.0 Flash with configured API key...")
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = genai.GenerativeModel(GEMINI_MODEL)
             
             # Test the connection with a simple prompt
             logger.info("🧪 Testing Gemini API connection...")
@@ -60,8 +243,17 @@ class GeminiService:
             logger.error("💡 Check your API key and internet connection")
             self.is_initialized = False
     
-    async def health_check(self) -> Dict[str, Any]:
-        """Check Gemini service health"""
+    def health_check_light(self) -> Dict[str, Any]:
+        """Liveness status from local state only - no Gemini round trip"""
+        return {
+            "status": "online" if self.is_initialized else "offline",
+            "model": "gemini-2.0-flash-exp",
+            "api_key_configured": bool(self.api_key and self.api_key != 'your_gemini_api_key')
+        }
+    
+    @ttl_cache(seconds=30, key=lambda self, no_cache=False: id(self))
+    async def health_check(self, no_cache: bool = False) -> Dict[str, Any]:
+        """Check Gemini service health (cached to spare API quota)"""
         if not self.is_initialized:
             return {
                 "status": "offline",
@@ -72,14 +264,17 @@ class GeminiService:
         
         try:
             # Quick health check with timeout
-            response = await self._generate_content_async("Health check. Respond with only: OK")
+            response = await self._generate_content_async(
+                "Health check. Respond with only: OK", max_attempts=1, timeout=HEALTH_CHECK_TIMEOUT
+            )
             if response and response.text and "ok" in response.text.lower().strip():
                 return {
                     "status": "online",
                     "model": "gemini-2.0-flash-exp",
                     "message": "Fully operational",
                     "api_key_configured": True,
-                    "api_key_status": "configured"
+                    "api_key_status": "configured",
+                    "response_cache": self.response_cache.stats()
                 }
             else:
                 return {
@@ -87,7 +282,8 @@ class GeminiService:
                     "model": "gemini-2.0-flash-exp", 
                     "message": "Responding but degraded",
                     "api_key_configured": True,
-                    "api_key_status": "configured"
+                    "api_key_status": "configured",
+                    "response_cache": self.response_cache.stats()
                 }
         except Exception as e:
             return {
@@ -156,7 +352,7 @@ class GeminiService:
         """
         
         try:
-            response = await self._generate_content_async(prompt)
+            response = await self._generate_content_async(prompt, coalesce=True, json_mode=True)
             result = self._parse_json_response(response.text)
             
             # Validate the response
@@ -168,6 +364,7 @@ class GeminiService:
             
         except Exception as e:
             logger.error(f"❌ Gemini schema generation failed: {str(e)}")
+            self._forget_response(prompt, json_mode=True)
             return self._generate_intelligent_fallback_schema(description, domain)
     
     async def generate_synthetic_data(
@@ -175,16 +372,22 @@ class GeminiService:
         schema: Dict[str, Any], 
         config: Dict[str, Any],
         description: str = "",
-        source_data: List[Dict[str, Any]] = None
+        source_data: List[Dict[str, Any]] = None,
+        on_progress: Optional[ProgressCallback] = None
     ) -> List[Dict[str, Any]]:
-        """Generate realistic synthetic data using Gemini 2.0 Flash"""
+        """Generate realistic synthetic data using Gemini 2.0 Flash.
+        
+        Large requests are generated in batches; `on_progress` is awaited after each one.
+        """
         
         if not self.is_initialized:
             logger.warning("🔄 Gemini not available, using intelligent fallback")
-            return self._generate_intelligent_fallback_data(schema, config.get('rowCount', 100))
+            return await run_in_threadpool(
+                self._generate_intelligent_fallback_data, schema, config.get('rowCount', 100)
+            )
         
         row_count = config.get('rowCount', 100)
-        logger.info(f"🤖 Generating {row_count} rows with Gemini 2.0 Flash...")
+        logger.info("🤖 Generating %d rows with Gemini 2.0 Flash...", row_count)
         
         domain = config.get('domain', 'general')
         
@@ -199,8 +402,8 @@ class GeminiService:
         
         # Split large requests to avoid JSON parsing issues
         if row_count > 50:
-            logger.info(f"🔄 Large request detected ({row_count} rows). Splitting into smaller batches...")
-            return await self._generate_large_dataset_batched(schema, config, description, source_data)
+            logger.info("🔄 Large request detected (%d rows). Splitting into smaller batches...", row_count)
+            return await self._generate_large_dataset_batched(schema, config, description, source_data, on_progress)
         
         prompt = f"""Generate EXACTLY {row_count} rows of synthetic data as a PERFECTLY VALID JSON ARRAY.
 
@@ -211,7 +414,7 @@ CRITICAL FORMATTING RULES:
 4. NO trailing commas
 5. NO explanatory text - ONLY the JSON array
 
-Schema to follow: {json.dumps(schema, indent=2)}
+Schema to follow: {_prompt_json(schema)}
 Domain: {domain}
 Description: "{description}"
 
@@ -230,13 +433,13 @@ Output format example:
 Generate {row_count} rows now:"""
 
         try:
-            logger.info("🔄 Sending request to Gemini 2.0 Flash...")
-            response = await self._generate_content_async(prompt)
+            logger.debug("🔄 Sending request to Gemini 2.0 Flash...")
+            response = await self._generate_content_async(prompt, json_mode=True)
             
             if not response or not response.text:
                 raise ValueError("Empty response from Gemini")
             
-            logger.info(f"📥 Received response from Gemini ({len(response.text)} characters)")
+            logger.debug("📥 Received response from Gemini (%d characters)", len(response.text))
             
             # Use enhanced parsing for better error handling
             data = self._parse_json_array_response_enhanced(response.text)
@@ -250,87 +453,183 @@ Generate {row_count} rows now:"""
             # Ensure we have the right number of rows
             final_data = data[:row_count] if len(data) > row_count else data
             
-            logger.info(f"✅ Gemini generated {len(final_data)} realistic data records successfully!")
+            logger.info("✅ Gemini generated %d realistic data records successfully!", len(final_data))
             return final_data
             
         except Exception as e:
-            logger.error(f"❌ Gemini generation failed: {str(e)}")
+            logger.error("❌ Gemini generation failed: %s", e)
             logger.info("🔄 Falling back to intelligent local generation...")
-            return self._generate_intelligent_fallback_data(schema, row_count)
+            return await run_in_threadpool(self._generate_intelligent_fallback_data, schema, row_count)
     
     async def _generate_large_dataset_batched(
         self, 
         schema: Dict[str, Any], 
         config: Dict[str, Any],
         description: str,
-        source_data: List[Dict[str, Any]] = None
+        source_data: List[Dict[str, Any]] = None,
+        on_progress: Optional[ProgressCallback] = None
     ) -> List[Dict[str, Any]]:
         """Generate large datasets in smaller batches to avoid JSON parsing issues"""
-        
+        final_data = [
+            row
+            async for rows in self.stream_synthetic_data(schema, config, description, on_progress)
+            for row in rows
+        ]
+        logger.info("🎉 Large dataset generation completed: %d total rows", len(final_data))
+        return final_data
+    
+    async def stream_synthetic_data(
+        self, 
+        schema: Dict[str, Any], 
+        config: Dict[str, Any],
+        description: str = "",
+        on_progress: Optional[ProgressCallback] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield generated rows batch by batch, in the order the batches finish.
+        
+        Lets a caller start on the first rows while later batches are still
+        generating, without holding the whole dataset. Model rows that repeat a
+        row from another batch are dropped; repeats within one batch are kept.
+        A batch that fails is replaced by fallback rows. The shortfall left by
+        dropped rows is topped up with one more model batch, then with fallback
+        rows that repeat nothing already yielded, so `rowCount` rows come back
+        unless the schema allows too few distinct rows.
+        """
         total_rows = config.get('rowCount', 100)
+        
+        if not self.is_initialized:
+            yield await run_in_threadpool(self._generate_intelligent_fallback_data, schema, total_rows)
+            return
+        
         batch_size = 25  # Smaller batches for more reliable parsing
         batches = (total_rows + batch_size - 1) // batch_size  # Ceiling division
         
-        logger.info(f"🔄 Generating {total_rows} rows in {batches} batches of {batch_size}")
+        logger.info("🔄 Generating %d rows in %d concurrent batches of %d", total_rows, batches, batch_size)
         
-        all_data = []
+        # Identical in every batch prompt, so encoded once rather than per batch
+        schema_json = _prompt_json(schema)
         
-        for batch_num in range(batches):
-            current_batch_size = min(batch_size, total_rows - len(all_data))
-            
-            logger.info(f"📦 Generating batch {batch_num + 1}/{batches} ({current_batch_size} rows)...")
+        async def run_batch(batch_num: int, current_batch_size: int,
+                            total_batches: int = batches) -> Tuple[int, List[Dict[str, Any]], bool]:
+            """(batch_num, rows, whether the rows are fallback data)"""
+            logger.debug("📦 Generating batch %d/%d (%d rows)...", batch_num + 1, total_batches, current_batch_size)
             
             batch_config = {**config, 'rowCount': current_batch_size}
             
             try:
-                batch_data = await self._generate_single_batch(schema, batch_config, description, batch_num)
+                batch_data = await self._generate_single_batch(
+                    schema, batch_config, description, batch_num, total_batches, schema_json=schema_json
+                )
                 
                 if batch_data:
-                    all_data.extend(batch_data)
-                    logger.info(f"✅ Batch {batch_num + 1} completed: {len(batch_data)} rows")
-                else:
-                    logger.warning(f"⚠️ Batch {batch_num + 1} failed, using fallback")
-                    fallback_batch = self._generate_intelligent_fallback_data(schema, current_batch_size)
-                    all_data.extend(fallback_batch)
+                    logger.debug("✅ Batch %d completed: %d rows", batch_num + 1, len(batch_data))
+                    return batch_num, batch_data, False
+                logger.warning("⚠️ Batch %d failed, using fallback", batch_num + 1)
                 
             except Exception as e:
-                logger.error(f"❌ Batch {batch_num + 1} failed: {str(e)}")
-                fallback_batch = self._generate_intelligent_fallback_data(schema, current_batch_size)
-                all_data.extend(fallback_batch)
+                logger.error("❌ Batch %d failed: %s", batch_num + 1, e)
             
-            # Stop if we have enough data
-            if len(all_data) >= total_rows:
-                break
+            return batch_num, self._generate_intelligent_fallback_data(schema, current_batch_size), True
         
-        final_data = all_data[:total_rows]
-        logger.info(f"🎉 Large dataset generation completed: {len(final_data)} total rows")
-        return final_data
+        # Batches are independent, so they decode in parallel; the coalescer's
+        # semaphore and the rate limiter bound how many are actually in flight
+        tasks = [
+            asyncio.ensure_future(run_batch(batch_num, min(batch_size, total_rows - batch_num * batch_size)))
+            for batch_num in range(batches)
+        ]
+        
+        # Batches can't see each other's rows, so a model row already produced by
+        # another batch is dropped (row encoding -> first batch that produced it)
+        first_batch: Dict[bytes, int] = {}
+        rows_done = 0
+        dropped = 0
+        
+        def row_key(row: Dict[str, Any]) -> bytes:
+            return orjson.dumps(row, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        
+        def keep(batch_num: int, batch_rows: List[Dict[str, Any]], is_fallback: bool) -> List[Dict[str, Any]]:
+            """The batch's rows to yield; every kept row is recorded for later top-up checks"""
+            nonlocal dropped
+            rows = []
+            for row in batch_rows:
+                key = row_key(row)
+                if is_fallback:
+                    first_batch.setdefault(key, batch_num)
+                    rows.append(row)
+                elif first_batch.setdefault(key, batch_num) == batch_num:
+                    rows.append(row)
+            dropped += len(batch_rows) - len(rows)
+            return rows[:total_rows - rows_done]
+        
+        try:
+            for next_batch in asyncio.as_completed(tasks):
+                rows = keep(*await next_batch)
+                rows_done += len(rows)
+                if on_progress:
+                    await on_progress(rows_done, total_rows)
+                if rows:
+                    yield rows
+        finally:
+            # A consumer that stops early shouldn't leave batches generating
+            for task in tasks:
+                task.cancel()
+        
+        if dropped:
+            logger.info("🔁 Dropped %d rows repeated across batches", dropped)
+        
+        # Top up the rows dropped as repeats: one more model batch first, then
+        # fallback rows, keeping only those that repeat nothing yielded so far
+        for attempt in range(TOP_UP_ATTEMPTS):
+            deficit = total_rows - rows_done
+            if deficit <= 0:
+                break
+            if attempt == 0:
+                batch_num, batch_rows, is_fallback = await run_batch(batches, deficit, batches + 1)
+            else:
+                batch_num, batch_rows = batches + attempt, await run_in_threadpool(
+                    self._generate_intelligent_fallback_data, schema, deficit
+                )
+            rows = [row for row in batch_rows if first_batch.setdefault(row_key(row), batch_num) == batch_num]
+            rows = rows[:deficit]
+            rows_done += len(rows)
+            if on_progress:
+                await on_progress(rows_done, total_rows)
+            if rows:
+                yield rows
+        
+        if rows_done < total_rows:
+            logger.warning("⚠️ Generated %d of %d rows; the schema allows too few distinct rows", rows_done, total_rows)
     
     async def _generate_single_batch(
         self, 
         schema: Dict[str, Any], 
         config: Dict[str, Any],
         description: str,
-        batch_num: int
+        batch_num: int,
+        total_batches: int = 1,
+        schema_json: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Generate a single batch of data with enhanced error handling"""
         
         row_count = config.get('rowCount', 25)
         domain = config.get('domain', 'general')
         
-        prompt = f"""Generate EXACTLY {row_count} rows of synthetic data as VALID JSON ARRAY.
+        # Everything that is the same across a request's batches comes first and
+        # the per-batch part last, so batches share the longest possible prompt prefix
+        prompt = f"""Generate synthetic data as a VALID JSON ARRAY.
 
-Schema: {json.dumps(schema, indent=2)}
+Schema: {schema_json or _prompt_json(schema)}
 Domain: {domain}
-Batch: {batch_num + 1}
 
 CRITICAL: Return ONLY the JSON array, no explanations:
 [{{"field": "value"}}, {{"field": "value"}}]
-        
-Generate {row_count} realistic rows for {domain} domain:"""
+
+Batch: {batch_num + 1} of {total_batches}, seed={batch_num}
+Use values distinct from the other batches.
+Generate EXACTLY {row_count} realistic rows for {domain} domain:"""
 
         try:
-            response = await self._generate_content_async(prompt)
+            response = await self._generate_content_async(prompt, json_mode=True)
             
             if not response or not response.text:
                 return []
@@ -343,29 +642,35 @@ Generate {row_count} realistic rows for {domain} domain:"""
                 return []
                 
         except Exception as e:
-            logger.warning(f"❌ Batch generation failed: {str(e)}")
+            logger.warning("❌ Batch generation failed: %s", e)
             return []
     
     async def analyze_data_comprehensive(
         self, 
         data: List[Dict[str, Any]], 
-        config: Dict[str, Any]
+        config: Dict[str, Any],
+        raise_on_error: bool = False
     ) -> Dict[str, Any]:
-        """Comprehensive data analysis using Gemini 2.0 Flash"""
+        """Comprehensive data analysis using Gemini 2.0 Flash.
+        
+        Failures return a heuristic fallback analysis, or raise with `raise_on_error`
+        for callers that track Gemini failures themselves.
+        """
         
         if not self.is_initialized:
+            if raise_on_error:
+                raise RuntimeError("Gemini service not initialized")
             return self._generate_fallback_analysis(data)
         
         logger.info(f"🔍 Analyzing data with Gemini 2.0 Flash...")
         
-        sample_data = data[:5] if len(data) > 5 else data
         
         prompt = f"""
         You are an expert data analyst. Perform comprehensive analysis on this dataset:
         
-        Sample Data: {json.dumps(sample_data, indent=2)}
+        Sample Data: {_prompt_sample(data, 5)}
         Total Records: {len(data)}
-        Configuration: {json.dumps(config, indent=2)}
+        Configuration: {_prompt_json(config)}
         
         Provide detailed analysis including:
         1. Domain classification (healthcare, finance, retail, etc.)
@@ -401,35 +706,48 @@ Generate {row_count} realistic rows for {domain} domain:"""
         """
         
         try:
-            response = await self._generate_content_async(prompt)
+            response = await self._generate_content_async(prompt, coalesce=True, json_mode=True)
             analysis = self._parse_json_response_enhanced(response.text)
+            if "error" in analysis:
+                raise ValueError(analysis["error"])
             
             logger.info(f"✅ Gemini analysis complete: {analysis.get('domain', 'unknown')} domain")
             return analysis
             
         except Exception as e:
             logger.error(f"❌ Gemini analysis failed: {str(e)}")
+            self._forget_response(prompt, json_mode=True)
+            if raise_on_error:
+                raise
             return self._generate_fallback_analysis(data)
     
-    async def assess_privacy_risks(
+    async def assess_privacy_and_bias(
         self, 
         data: List[Dict[str, Any]], 
-        config: Dict[str, Any]
+        config: Dict[str, Any],
+        raise_on_error: bool = False
     ) -> Dict[str, Any]:
-        """Assess privacy risks using Gemini 2.0 Flash"""
+        """Privacy risk assessment and bias detection in one Gemini 2.0 Flash call.
+        
+        The call is coalesced, so the privacy and bias agents asking concurrently
+        for the same data share a single request. Failures return default
+        assessments, or raise with `raise_on_error`.
+        """
+        fallback = copy.deepcopy(FALLBACK_ASSESSMENTS)
         
         if not self.is_initialized:
-            return {"privacy_score": 85, "risks": [], "recommendations": []}
+            if raise_on_error:
+                raise RuntimeError("Gemini service not initialized")
+            return fallback
         
-        sample_data = data[:3] if data else []
         
         prompt = f"""
-        Conduct comprehensive privacy risk assessment on this data:
+        Conduct comprehensive privacy risk assessment and bias detection on this data:
         
-        Sample Data: {json.dumps(sample_data, indent=2)}
+        Sample Data: {_prompt_sample(data, 5)}
         Domain: {config.get('domain', 'general')}
         
-        Analyze for:
+        For privacy_assessment, analyze for:
         1. PII (Personally Identifiable Information) detection
         2. Sensitive attributes identification
         3. Re-identification risks
@@ -437,91 +755,302 @@ Generate {row_count} realistic rows for {domain} domain:"""
         5. GDPR/CCPA compliance considerations
         6. Industry-specific privacy requirements
         
-        Return valid JSON:
+        For bias_analysis, analyze for multiple bias types:
+        1. Demographic bias (age, gender, race, location)
+        2. Selection bias in data collection
+        3. Confirmation bias patterns
+        4. Historical bias perpetuation
+        5. Representation bias
+        6. Algorithmic fairness considerations
+        
+        Return valid JSON with exactly these two top-level keys:
         {{
-          "privacy_score": 85,
-          "pii_detected": [],
-          "sensitive_attributes": [],
-          "risk_level": "low|medium|high",
-          "compliance_notes": [],
-          "recommendations": [],
-          "anonymization_suggestions": []
+          "privacy_assessment": {{
+            "privacy_score": 85,
+            "pii_detected": [],
+            "sensitive_attributes": [],
+            "risk_level": "low|medium|high",
+            "compliance_notes": [],
+            "recommendations": [],
+            "anonymization_suggestions": []
+          }},
+          "bias_analysis": {{
+            "bias_score": 88,
+            "detected_biases": [],
+            "bias_types": [],
+            "affected_groups": [],
+            "severity_assessment": {{}},
+            "mitigation_strategies": [],
+            "fairness_metrics": {{}},
+            "recommendations": []
+          }}
         }}
         """
         
         try:
-            response = await self._generate_content_async(prompt)
-            return self._parse_json_response(response.text)
+            response = await self._generate_content_async(prompt, coalesce=True, json_mode=True)
+            combined = self._parse_json_response(response.text)
+            if not any(isinstance(combined.get(key), dict) for key in fallback):
+                raise ValueError(combined.get("error", "Response has no privacy or bias assessment"))
+            return {
+                key: combined[key] if isinstance(combined.get(key), dict) else default
+                for key, default in fallback.items()
+            }
         except Exception as e:
-            logger.error(f"❌ Privacy assessment failed: {str(e)}")
-            return {"privacy_score": 85, "risks": [], "recommendations": []}
+            logger.error(f"❌ Privacy and bias assessment failed: {str(e)}")
+            self._forget_response(prompt, json_mode=True)
+            if raise_on_error:
+                raise
+            return fallback
     
-    async def detect_bias_comprehensive(
+    async def run_full_analysis(
         self, 
         data: List[Dict[str, Any]], 
         config: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Comprehensive bias detection using Gemini 2.0 Flash"""
+        """Domain analysis plus privacy and bias assessment, in a single Gemini call"""
+        return await self.analyze_all(data, config)
+    
+    async def analyze_all(
+        self, 
+        data: List[Dict[str, Any]], 
+        config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Domain analysis, privacy assessment and bias detection in one Gemini 2.0 Flash call.
+        
+        Returns {"analysis", "privacy_assessment", "bias_analysis"} in the shapes
+        analyze_data_comprehensive and assess_privacy_and_bias return, so a section
+        missing from the combined response falls back on its own.
+        """
+        fallback = copy.deepcopy(FALLBACK_ASSESSMENTS)
         
         if not self.is_initialized:
-            return {"bias_score": 88, "bias_types": [], "recommendations": []}
+            return {"analysis": self._generate_fallback_analysis(data), **fallback}
         
-        sample_data = data[:5] if data else []
+        logger.info("🔍 Running combined analysis with Gemini 2.0 Flash...")
         
         prompt = f"""
-        Perform comprehensive bias detection analysis:
+        You are an expert data analyst. Analyze this dataset, assess its privacy risks and detect bias:
         
-        Sample Data: {json.dumps(sample_data, indent=2)}
-        Domain: {config.get('domain', 'general')}
+        Sample Data: {_prompt_sample(data, 5)}
+        Total Records: {len(data)}
+        Configuration: {_prompt_json(config)}
         
-        Analyze for multiple bias types:
-        1. Demographic bias (age, gender, race, location)
-        2. Selection bias in data collection
-        3. Confirmation bias patterns
-        4. Historical bias perpetuation
-        5. Representation bias
-        6. Algorithmic fairness considerations
+        For analysis, cover domain classification, data quality, schema inference,
+        statistical patterns, field relationships, completeness and recommendations
+        for synthetic generation.
+        
+        For privacy_assessment, cover PII detection, sensitive attributes,
+        re-identification and linkage risks, and GDPR/CCPA and industry requirements.
+        
+        For bias_analysis, cover demographic, selection, confirmation, historical and
+        representation bias, and algorithmic fairness.
         
-        Return valid JSON:
+        Return ONLY valid JSON (no explanations) with exactly these three top-level keys:
         {{
-          "bias_score": 88,
-          "detected_biases": [],
-          "bias_types": [],
-          "affected_groups": [],
-          "severity_assessment": {{}},
-          "mitigation_strategies": [],
-          "fairness_metrics": {{}},
-          "recommendations": []
+          "analysis": {{
+            "domain": "detected_domain",
+            "confidence": 0.95,
+            "data_quality": {{"score": 85, "issues": [], "recommendations": []}},
+            "schema_inference": {{}},
+            "statistical_summary": {{}},
+            "relationships": [],
+            "recommendations": {{
+              "generation_strategy": "",
+              "quality_improvements": [],
+              "privacy_enhancements": []
+            }}
+          }},
+          "privacy_assessment": {{
+            "privacy_score": 85,
+            "pii_detected": [],
+            "sensitive_attributes": [],
+            "risk_level": "low|medium|high",
+            "compliance_notes": [],
+            "recommendations": [],
+            "anonymization_suggestions": []
+          }},
+          "bias_analysis": {{
+            "bias_score": 88,
+            "detected_biases": [],
+            "bias_types": [],
+            "affected_groups": [],
+            "severity_assessment": {{}},
+            "mitigation_strategies": [],
+            "fairness_metrics": {{}},
+            "recommendations": []
+          }}
         }}
         """
         
         try:
-            response = await self._generate_content_async(prompt)
-            return self._parse_json_response(response.text)
-        except Exception as e:
-            logger.error(f"❌ Bias detection failed: {str(e)}")
-            return {"bias_score": 88, "bias_types": [], "recommendations": []}
+            response = await self._generate_content_async(prompt, coalesce=True, json_mode=True)
+            combined = self._parse_json_response_enhanced(response.text)
+        except Exception:
+            logger.exception("❌ Combined analysis failed")
+            combined = {}
+        
+        analysis = combined.get("analysis")
+        if not isinstance(analysis, dict):
+            self._forget_response(prompt, json_mode=True)
+            analysis = self._generate_fallback_analysis(data)
+        else:
+            logger.info("✅ Gemini combined analysis complete: %s domain", analysis.get('domain', 'unknown'))
+        
+        return {
+            "analysis": analysis,
+            **{
+                key: combined[key] if isinstance(combined.get(key), dict) else default
+                for key, default in fallback.items()
+            }
+        }
+    
+    async def batch_analyze(
+        self,
+        items: List[Dict[str, Any]],
+        max_concurrent: int = 10,
+        output_jsonl: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """run_full_analysis over many datasets concurrently.
+        
+        Each item is {"custom_id", "data", "config"}. With `output_jsonl`, every
+        result is appended as {"custom_id", "result"} as soon as it is ready, and
+        items already present in the file are loaded instead of re-analyzed, so an
+        interrupted batch resumes where it stopped. Returns results by custom_id.
+        """
+        results: Dict[str, Any] = {}
+        if output_jsonl and os.path.exists(output_jsonl):
+            results = await run_in_threadpool(self._load_batch_checkpoint, output_jsonl)
+            logger.info("📂 Resuming batch analysis: %d items already done", len(results))
+        
+        semaphore = asyncio.Semaphore(max_concurrent)
+        write_lock = asyncio.Lock()
+        
+        async def analyze_item(item: Dict[str, Any]):
+            async with semaphore:
+                result = await self.run_full_analysis(item.get("data", []), item.get("config", {}))
+            results[item["custom_id"]] = result
+            if output_jsonl:
+                line = orjson.dumps({"custom_id": item["custom_id"], "result": result},
+                                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+                async with write_lock:
+                    await run_in_threadpool(self._append_batch_checkpoint, output_jsonl, line)
+        
+        pending = [item for item in items if item["custom_id"] not in results]
+        logger.info("📦 Batch analysis: %d of %d items to analyze", len(pending), len(items))
+        # Rate limiting and retries apply per Gemini request underneath
+        await asyncio.gather(*(analyze_item(item) for item in pending))
+        return results
+    
+    @staticmethod
+    def _load_batch_checkpoint(path: str) -> Dict[str, Any]:
+        """Results already written by an earlier batch_analyze run; a torn last line is ignored"""
+        results = {}
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue
+                results[entry["custom_id"]] = entry["result"]
+        return results
+    
+    @staticmethod
+    def _append_batch_checkpoint(path: str, line: bytes):
+        with open(path, "ab") as f:
+            f.write(line)
+    
+    async def assess_privacy_risks(
+        self, 
+        data: List[Dict[str, Any]], 
+        config: Dict[str, Any],
+        raise_on_error: bool = False
+    ) -> Dict[str, Any]:
+        """Assess privacy risks using Gemini 2.0 Flash"""
+        return (await self.assess_privacy_and_bias(data, config, raise_on_error))["privacy_assessment"]
+    
+    async def detect_bias_comprehensive(
+        self, 
+        data: List[Dict[str, Any]], 
+        config: Dict[str, Any],
+        raise_on_error: bool = False
+    ) -> Dict[str, Any]:
+        """Comprehensive bias detection using Gemini 2.0 Flash"""
+        return (await self.assess_privacy_and_bias(data, config, raise_on_error))["bias_analysis"]
     
-    async def _generate_content_async(self, prompt: str):
-        """Generate content asynchronously"""
+    async def _generate_content_async(self, prompt: str, coalesce: bool = False, json_mode: bool = False,
+                                      max_attempts: Optional[int] = None, timeout: Optional[float] = None):
+        """Generate content asynchronously.
+        
+        All calls share a concurrency limit. With `coalesce=True`, concurrent
+        calls with an identical prompt share one API call and the response is
+        cached for `gemini_cache_ttl` seconds - only use it where identical
+        prompts should get identical answers (schemas, analyses), and call
+        `_forget_response` when the response turns out unusable. With
+        `json_mode=True` the model is constrained to emit bare JSON.
+        `max_attempts` and `timeout` override the configured retry schedule.
+        """
         if not self.model:
             raise Exception("Gemini model not initialized")
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.model.generate_content, prompt)
+        prompt = _compact_prompt(prompt)
+        key = self._response_key(prompt, json_mode) if coalesce else None
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                logger.debug("⚡ Gemini response cache hit")
+                return cached
+        
+        response = await self.coalescer.run(key, lambda: self._call_model(prompt, json_mode, max_attempts, timeout))
+        if key is not None:
+            self.response_cache.set(key, response)
+        return response
+    
+    @staticmethod
+    def _response_key(compact_prompt: str, json_mode: bool) -> Tuple[str, bool, str]:
+        return GEMINI_MODEL, json_mode, digest(compact_prompt)
+    
+    def _forget_response(self, prompt: str, json_mode: bool = False):
+        """Drop a cached response that failed to parse or validate, so the next call asks again"""
+        self.response_cache.pop(self._response_key(_compact_prompt(prompt), json_mode))
+    
+    async def _call_model(self, prompt: str, json_mode: bool = False,
+                          max_attempts: Optional[int] = None, timeout: Optional[float] = None):
+        """One rate-limited Gemini request, retried with jittered exponential backoff on transient errors or timeouts"""
+        max_attempts = max(1, max_attempts or settings.gemini_max_attempts)
+        for attempt in range(max_attempts):
+            if self.request_bucket:
+                await self.request_bucket.acquire()
+            if self.token_bucket:
+                # Token usage is only known afterwards, so wait off any debt before sending
+                await self.token_bucket.acquire(0)
+            
+            try:
+                # Native async client: no executor thread per in-flight request.
+                # A stuck request is abandoned and retried rather than holding the pipeline.
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        prompt, generation_config=JSON_GENERATION_CONFIG if json_mode else None
+                    ),
+                    timeout=timeout or settings.gemini_request_timeout
+                )
+                break
+            except TRANSIENT_GEMINI_ERRORS as e:
+                if attempt + 1 >= max_attempts:
+                    raise
+                delay = random.uniform(0, min(30, 2 ** attempt))
+                logger.warning("⚠️ Transient Gemini error (%s), retrying in %.1fs", type(e).__name__, delay)
+                await asyncio.sleep(delay)
+        
+        usage = getattr(response, "usage_metadata", None)
+        if self.token_bucket and usage:
+            self.token_bucket.consume(usage.total_token_count)
+        return response
     
     def _parse_json_response(self, text: str) -> Dict[str, Any]:
         """Parse JSON from Gemini response"""
         try:
-            # Clean the text
-            text = text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.endswith('```'):
-                text = text[:-3]
-            text = text.strip()
-            
-            return json.loads(text)
+            return orjson.loads(_extract_json(text))
         except Exception as e:
             logger.error(f"❌ JSON parsing failed: {str(e)}")
             return {"error": "Failed to parse response"}
@@ -533,15 +1062,21 @@ Generate {row_count} realistic rows for {domain} domain:"""
             
             # Try direct parse
             try:
-                return json.loads(cleaned)
-            except json.JSONDecodeError:
+                return orjson.loads(cleaned)
+            except orjson.JSONDecodeError:
+                pass
+            
+            # Lenient parse: trailing commas, single quotes and comments in one pass
+            try:
+                return json5.loads(cleaned)
+            except ValueError:
                 pass
             
             # Try fixing common errors
             fixed = self._fix_common_json_errors(cleaned)
             try:
-                return json.loads(fixed)
-            except json.JSONDecodeError as e:
+                return orjson.loads(fixed)
+            except orjson.JSONDecodeError as e:
                 logger.error(f"❌ Enhanced JSON parsing failed: {str(e)}")
                 return {"error": "Failed to parse response"}
                 
@@ -552,74 +1087,64 @@ Generate {row_count} realistic rows for {domain} domain:"""
     def _parse_json_array_response(self, text: str) -> List[Dict[str, Any]]:
         """Parse JSON array from Gemini response"""
         try:
-            # Clean the text
-            text = text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            elif text.startswith('```'):
-                text = text[4:]
-            if text.endswith('```'):
-                text = text[:-3]
-            text = text.strip()
-            
-            # Find JSON array
-            start_idx = text.find('[')
-            end_idx = text.rfind(']') + 1
-            
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = text[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                return json.loads(text)
-                
+            return orjson.loads(_extract_json(text, array=True))
         except Exception as e:
             logger.error(f"❌ JSON array parsing failed: {str(e)}")
             return []
 
     def _parse_json_array_response_enhanced(self, text: str) -> List[Dict[str, Any]]:
         """Enhanced JSON array parsing with multiple fallback strategies"""
-        logger.info("🔧 Parsing Gemini response with enhanced error handling...")
+        logger.debug("🔧 Parsing Gemini response with enhanced error handling...")
         
         try:
             # Strategy 1: Clean and direct parse
             cleaned_text = self._clean_json_response(text)
-            logger.debug(f"📝 Cleaned text preview: {cleaned_text[:100]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📝 Cleaned text preview: %s...", cleaned_text[:100])
             # Remove commented-out code, just keep the cleaned_text assignment            
             try:
-                result = json.loads(cleaned_text)
+                result = orjson.loads(cleaned_text)
                 if isinstance(result, list):
-                    logger.info("✅ Strategy 1 successful: Direct JSON parse")
+                    logger.debug("✅ Strategy 1 successful: Direct JSON parse")
                     return result
                 elif isinstance(result, dict):
-                    logger.info("✅ Strategy 1 successful: Single object converted to array")
+                    logger.debug("✅ Strategy 1 successful: Single object converted to array")
                     return [result]
-            except json.JSONDecodeError as e:
-                logger.debug(f"⚠️ Strategy 1 failed: {str(e)}")
+            except orjson.JSONDecodeError as e:
+                logger.debug("⚠️ Strategy 1 failed: %s", e)
             
             # Strategy 2: Extract array content
             array_content = self._extract_json_array(cleaned_text)
             if array_content:
                 try:
-                    result = json.loads(array_content)
-                    logger.info("✅ Strategy 2 successful: Array extraction")
+                    result = orjson.loads(array_content)
+                    logger.debug("✅ Strategy 2 successful: Array extraction")
                     return result if isinstance(result, list) else [result]
-                except json.JSONDecodeError as e:
-                    logger.debug(f"⚠️ Strategy 2 failed: {str(e)}")
+                except orjson.JSONDecodeError as e:
+                    logger.debug("⚠️ Strategy 2 failed: %s", e)
+            
+            # Strategy 3: Lenient JSON5 parse (trailing commas, single quotes, comments)
+            try:
+                result = json5.loads(array_content or cleaned_text)
+                logger.info("✅ Strategy 3 successful: Lenient parse")
+                return result if isinstance(result, list) else [result]
+            except ValueError as e:
+                logger.debug("⚠️ Strategy 3 failed: %s", e)
             
-            # Strategy 3: Fix common JSON errors
+            # Strategy 4: Fix common JSON errors
             fixed_json = self._fix_common_json_errors(cleaned_text)
             if fixed_json:
                 try:
-                    result = json.loads(fixed_json)
-                    logger.info("✅ Strategy 3 successful: Error fixing")
+                    result = orjson.loads(fixed_json)
+                    logger.info("✅ Strategy 4 successful: Error fixing")
                     return result if isinstance(result, list) else [result]
-                except json.JSONDecodeError as e:
-                    logger.debug(f"⚠️ Strategy 3 failed: {str(e)}")
+                except orjson.JSONDecodeError as e:
+                    logger.debug("⚠️ Strategy 4 failed: %s", e)
             
-            # Strategy 4: Parse line by line (for badly formatted responses)
+            # Strategy 5: Parse line by line (for badly formatted responses)
             line_parsed = self._parse_line_by_line(text)
             if line_parsed:
-                logger.info("✅ Strategy 4 successful: Line-by-line parsing")
+                logger.info("✅ Strategy 5 successful: Line-by-line parsing")
                 return line_parsed
             
             logger.error("❌ All parsing strategies failed")
@@ -631,36 +1156,7 @@ Generate {row_count} realistic rows for {domain} domain:"""
     
     def _clean_json_response(self, text: str) -> str:
         """Clean Gemini response for JSON parsing"""
-        # Remove code block markers
-        text = text.strip()
-        if text.startswith('```json'):
-            text = text[7:]
-        elif text.startswith('```'):
-            text = text[3:]
-        if text.endswith('```'):
-            text = text[:-3]
-        
-        # Remove any text before the first [ or {
-        json_start = -1
-        for i, char in enumerate(text):
-            if char in '[{':
-                json_start = i
-                break
-        
-        if json_start > 0:
-            text = text[json_start:]
-        
-        # Remove any text after the last ] or }
-        json_end = -1
-        for i in range(len(text) - 1, -1, -1):
-            if text[i] in ']}':
-                json_end = i + 1
-                break
-        
-        if json_end > 0:
-            text = text[:json_end]
-        
-        return text.strip()
+        return _extract_json(text)
     
     def _extract_json_array(self, text: str) -> str:
         """Extract JSON array from text"""
@@ -676,18 +1172,18 @@ Generate {row_count} realistic rows for {domain} domain:"""
         """Fix common JSON formatting errors"""
         try:
             # Remove trailing commas
-            text = re.sub(r',(\s*[}\]])', r'\1', text)
+            text = TRAILING_COMMA_RE.sub(r'\1', text)
             
             # Fix single quotes to double quotes
-            text = re.sub(r"'([^']*)':", r'"\1":', text)  # Keys
-            text = re.sub(r":\s*'([^']*)'", r': "\1"', text)  # String values
+            text = SINGLE_QUOTED_KEY_RE.sub(r'"\1":', text)  # Keys
+            text = SINGLE_QUOTED_VALUE_RE.sub(r': "\1"', text)  # String values
             
             # Remove comments
-            text = re.sub(r'//.*?\n', '\n', text)
-            text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
+            text = LINE_COMMENT_RE.sub('\n', text)
+            text = BLOCK_COMMENT_RE.sub('', text)
             
             # Fix missing commas between objects
-            text = re.sub(r'}\s*{', '}, {', text)
+            text = ADJACENT_OBJECTS_RE.sub('}, {', text)
             
             return text
         except Exception as e:
@@ -706,7 +1202,7 @@ Generate {row_count} realistic rows for {domain} domain:"""
             
             if clean_lines:
                 clean_text = '\n'.join(clean_lines)
-                return json.loads(clean_text)
+                return orjson.loads(clean_text)
         except Exception as e:
             logger.warning(f"Line-by-line parsing failed: {str(e)}")
         
@@ -734,14 +1230,13 @@ Generate {row_count} realistic rows for {domain} domain:"""
                 logger.warning(f"⚠️ Row {i} missing fields: {missing_fields}")
                 # Don't fail, just warn
         
-        logger.info(f"✅ Data validation passed: {len(data)} rows with {len(data[0].keys()) if data else 0} fields")
+        logger.debug("✅ Data validation passed: %d rows with %d fields", len(data), len(data[0]) if data else 0)
     
     def _generate_intelligent_fallback_schema(self, description: str, domain: str) -> Dict[str, Any]:
         """Generate intelligent fallback schema"""
         logger.info("🔄 Using intelligent fallback schema generation")
         
-        # Analyze description for key terms
-        desc_lower = description.lower()
+        domain_fields, detected_domain = _pick_fallback_fields(description, domain)
         
         base_schema = {
             "id": {
@@ -751,32 +1246,7 @@ Generate {row_count} realistic rows for {domain} domain:"""
                 "examples": [str(uuid.uuid4()) for _ in range(3)]
             }
         }
-        
-        # Domain-specific intelligent schema
-        if "patient" in desc_lower or "medical" in desc_lower or domain == "healthcare":
-            base_schema.update({
-                "patient_id": {"type": "string", "description": "Patient identifier", "examples": ["PT001", "PT002", "PT003"]},
-                "name": {"type": "string", "description": "Patient name", "examples": ["Ahmad Hassan", "Fatima Al-Zahra", "Omar Khalil"]},
-                "age": {"type": "number", "description": "Patient age", "constraints": {"min": 18, "max": 90}, "examples": [45, 32, 67]},
-                "gender": {"type": "string", "description": "Patient gender", "examples": ["Male", "Female"]},
-                "diagnosis": {"type": "string", "description": "Medical diagnosis", "examples": ["Hypertension", "Diabetes Type 2", "Asthma"]}
-            })
-            detected_domain = "healthcare"
-        elif "finance" in desc_lower or "transaction" in desc_lower or domain == "finance":
-            base_schema.update({
-                "account_id": {"type": "string", "description": "Account identifier", "examples": ["ACC001", "ACC002", "ACC003"]},
-                "amount": {"type": "number", "description": "Transaction amount", "examples": [1500.50, 750.25, 2200.00]},
-                "currency": {"type": "string", "description": "Currency", "examples": ["USD", "EUR", "SAR"]},
-                "transaction_type": {"type": "string", "description": "Transaction type", "examples": ["credit", "debit", "transfer"]}
-            })
-            detected_domain = "finance"
-        else:
-            base_schema.update({
-                "name": {"type": "string", "description": "Name", "examples": ["John Doe", "Jane Smith", "Alex Johnson"]},
-                "value": {"type": "number", "description": "Numeric value", "examples": [100, 200, 300]},
-                "category": {"type": "string", "description": "Category", "examples": ["A", "B", "C"]}
-            })
-            detected_domain = domain
+        base_schema.update(domain_fields)
         
         return {
             "schema": base_schema,
@@ -791,16 +1261,59 @@ Generate {row_count} realistic rows for {domain} domain:"""
         """Generate intelligent fallback data"""
         logger.info(f"🔄 Using intelligent fallback data generation for {row_count} rows")
         
-        data = []
-        for i in range(row_count):
-            row = {}
-            for field_name, field_info in schema.items():
-                row[field_name] = self._generate_realistic_value(field_info, field_name, i)
-            data.append(row)
+        # Hoist loop invariants: one clock read and one schema walk for the whole batch
+        base_date = datetime.now()
+        fields = list(schema.items())
+        
+        if row_count >= VECTORIZED_FALLBACK_THRESHOLD and fields:
+            index = np.arange(row_count)
+            field_names = [field_name for field_name, _ in fields]
+            columns = [
+                self._generate_realistic_column(field_info, field_name, index, base_date)
+                for field_name, field_info in fields
+            ]
+            return [dict(zip(field_names, values)) for values in zip(*columns)]
+        
+        return [
+            {field_name: self._generate_realistic_value(field_info, field_name, i, base_date)
+             for field_name, field_info in fields}
+            for i in range(row_count)
+        ]
+    
+    def _generate_realistic_column(self, field_info: Dict[str, Any], field_name: str,
+                                   index: np.ndarray, base_date: datetime) -> List[Any]:
+        """Vectorized counterpart of _generate_realistic_value, returning a whole column"""
+        field_type = field_info.get('type', 'string')
+        examples = field_info.get('examples', [])
+        constraints = field_info.get('constraints', {})
+        
+        if examples:
+            return cycle_examples(examples, index).tolist()
+        
+        field_lower = field_name.lower()
+        
+        if 'patient' in field_lower and field_type == 'string':
+            column = np.char.add("PT", np.char.zfill((1000 + index).astype(str), 4))
+        elif 'name' in field_lower:
+            names = np.array(['Ahmad Hassan', 'Fatima Al-Zahra', 'Omar Khalil', 'Aisha Mahmoud', 'Ali Rahman'], dtype=object)
+            column = names[index % len(names)]
+        elif 'age' in field_lower:
+            column = 25 + (index * 3) % 50
+        elif field_type == 'uuid':
+            return [str(uuid.uuid4()) for _ in range(len(index))]
+        elif field_type == 'number':
+            min_val = constraints.get('min', 1)
+            max_val = constraints.get('max', 1000)
+            column = min_val + (index * (max_val - min_val) // 100)
+        elif field_type in ['date', 'datetime']:
+            column = isoformat_dates(np.datetime64(base_date, 'us') - (index * 10).astype('timedelta64[D]'))
+        else:
+            column = np.char.add(f"{field_name}_", (index + 1).astype(str))
         
-        return data
+        return column.tolist()
     
-    def _generate_realistic_value(self, field_info: Dict[str, Any], field_name: str, index: int):
+    def _generate_realistic_value(self, field_info: Dict[str, Any], field_name: str, index: int,
+                                  base_date: Optional[datetime] = None):
         """Generate realistic values for fallback"""
         field_type = field_info.get('type', 'string')
         examples = field_info.get('examples', [])
@@ -826,16 +1339,18 @@ Generate {row_count} realistic rows for {domain} domain:"""
             max_val = constraints.get('max', 1000)
             return min_val + (index * (max_val - min_val) // 100)
         elif field_type in ['date', 'datetime']:
-            base_date = datetime.now()
+            base_date = base_date or datetime.now()
             return (base_date - timedelta(days=index * 10)).isoformat()
         else:
             return f"{field_name}_{index + 1}"
     
     def _generate_sample_data_from_schema(self, schema: Dict[str, Any], count: int) -> List[Dict[str, Any]]:
         """Generate sample data from schema"""
+        base_date = datetime.now()
+        fields = list(schema.items())
         return [
-            {field: self._generate_realistic_value(info, field, i) 
-             for field, info in schema.items()}
+            {field: self._generate_realistic_value(info, field, i, base_date) 
+             for field, info in fields}
             for i in range(count)
         ]
     
@@ -845,13 +1360,13 @@ Generate {row_count} realistic rows for {domain} domain:"""
             return {"domain": "unknown", "confidence": 0.5}
         
         # Simple heuristic analysis
-        first_item = data[0]
-        fields = list(first_item.keys())
+        fields = data[0].keys()
         
+        lower_fields = {field.lower() for field in fields}
         domain = "general"
-        if any(field.lower() in ['patient', 'diagnosis', 'treatment'] for field in fields):
+        if not lower_fields.isdisjoint(HEALTHCARE_FIELD_NAMES):
             domain = "healthcare"
-        elif any(field.lower() in ['account', 'transaction', 'amount'] for field in fields):
+        elif not lower_fields.isdisjoint(FINANCE_FIELD_NAMES):
             domain = "finance"
         
         return {
@@ -3,27 +3,86 @@ import json
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import asyncio
+import os
+import logging
 
 from ..config import settings
+from ..utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Performance metrics reported by get_performance_metrics, with their defaults
+PERFORMANCE_METRIC_DEFAULTS = {
+    "avg_generation_time": 0,
+    "success_rate": 100,
+    "total_generations": 0,
+    "total_datasets": 0,
+    "cpu_usage": 0,
+    "memory_usage": 0
+}
+
+# Jobs whose last reported progress is remembered for debouncing; matches the job key TTL
+PROGRESS_TRACKED_JOBS = 1024
+PROGRESS_TRACKED_SECONDS = 3600
+
+# Records progress in the job's progress hash and publishes it, atomically and in one
+# round-trip. KEYS: job, progress hash. ARGV: progress, message, timestamp, status,
+# ttl, channel (empty to skip publishing), job id. Returns 0 when the job no longer exists.
+REPORT_JOB_PROGRESS_SCRIPT = """
+local job = redis.call('GET', KEYS[1])
+if not job then
+    return 0
+end
+redis.call('HSET', KEYS[2], 'progress', ARGV[1], 'last_updated', ARGV[3])
+if ARGV[2] ~= '' then
+    redis.call('HSET', KEYS[2], 'message', ARGV[2])
+end
+if ARGV[4] ~= '' then
+    redis.call('HSET', KEYS[2], 'status', ARGV[4])
+end
+redis.call('EXPIRE', KEYS[2], ARGV[5])
+if ARGV[6] ~= '' then
+    local status = redis.call('HGET', KEYS[2], 'status') or cjson.decode(job)['status']
+    redis.call('PUBLISH', ARGV[6], cjson.encode({
+        job_id = ARGV[7], progress = tonumber(ARGV[1]),
+        message = ARGV[2], status = status, timestamp = ARGV[3]
+    }))
+end
+return 1
+"""
 
 class RedisService:
     def __init__(self):
+        self.pool: Optional[redis.BlockingConnectionPool] = None
         self.redis_client: Optional[redis.Redis] = None
+        # Last progress reported per job, used to skip near-duplicate updates
+        self.last_reported_progress = TTLCache(PROGRESS_TRACKED_JOBS, PROGRESS_TRACKED_SECONDS)
+        self.report_progress_script = None
         
     async def initialize(self):
-        """Initialize Redis connection"""
-        self.redis_client = redis.from_url(
+        """Initialize Redis connection pool"""
+        # One bounded pool per worker process, shared by every coroutine.
+        # Keep workers * redis_max_connections below the server's maxclients.
+        self.pool = redis.BlockingConnectionPool.from_url(
             settings.redis_url,
             password=settings.redis_password,
+            max_connections=settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+            health_check_interval=30,
+            client_name=f"datagenesis-{os.getpid()}",
             decode_responses=True
         )
+        self.redis_client = redis.Redis(connection_pool=self.pool)
+        self.report_progress_script = self.redis_client.register_script(REPORT_JOB_PROGRESS_SCRIPT)
         await self.redis_client.ping()
-        print("✅ Redis connected successfully")
+        logger.info("✅ Redis connected successfully")
         
     async def close(self):
-        """Close Redis connection"""
+        """Close Redis connection pool"""
         if self.redis_client:
             await self.redis_client.close()
+        if self.pool:
+            await self.pool.disconnect()
             
     async def ping(self) -> bool:
         """Check Redis health"""
@@ -45,7 +104,21 @@ class RedisService:
         
     async def get_cache(self, key: str) -> Optional[Any]:
         """Get cached value"""
-        value = await self.redis_client.get(key)
+        return self._decode(await self.redis_client.get(key))
+        
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several cached values in a single pipelined round-trip"""
+        if not keys:
+            return []
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+            values = await pipe.execute()
+        return [self._decode(value) for value in values]
+        
+    @staticmethod
+    def _decode(value: Optional[str]) -> Optional[Any]:
+        """Decode a stored value, falling back to the raw string"""
         if value:
             try:
                 return json.loads(value)
@@ -68,13 +141,7 @@ class RedisService:
         
     async def get_metric(self, metric: str) -> Optional[Any]:
         """Get a metric value"""
-        value = await self.redis_client.get(f"metric:{metric}")
-        if value:
-            try:
-                return json.loads(value)
-            except:
-                return value
-        return None
+        return await self.get_cache(f"metric:{metric}")
         
     # Session Management
     async def store_user_session(self, user_id: str, session_data: Dict[str, Any]) -> bool:
@@ -103,16 +170,13 @@ class RedisService:
         
     async def get_agent_status(self) -> Dict[str, Any]:
         """Get all agent statuses"""
-        agents = {}
         agent_keys = await self.redis_client.keys("agent:*")
-        
-        for key in agent_keys:
-            agent_id = key.split(":", 1)[1]
-            status = await self.get_cache(key)
-            if status:
-                agents[agent_id] = status
-                
-        return agents
+        statuses = await self.get_many(agent_keys)
+        return {
+            key.split(":", 1)[1]: status
+            for key, status in zip(agent_keys, statuses)
+            if status
+        }
         
     # Generation Job Tracking
     async def start_generation_job(self, job_id: str, job_data: Dict[str, Any]) -> bool:
@@ -129,16 +193,56 @@ class RedisService:
             json.dumps(job_data)
         )
         
+    async def get_generation_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job with its latest reported progress"""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(f"job:{job_id}")
+            pipe.hgetall(f"job:{job_id}:progress")
+            job, progress = await pipe.execute()
+        
+        job = self._decode(job)
+        if not isinstance(job, dict):
+            return None
+        if progress:
+            job.update(progress, progress=int(progress["progress"]))
+        return job
+        
     async def update_job_progress(self, job_id: str, progress: int, status: str = None) -> bool:
         """Update job progress"""
-        job = await self.get_cache(f"job:{job_id}")
-        if job:
-            job["progress"] = progress
-            job["last_updated"] = datetime.utcnow().isoformat()
-            if status:
-                job["status"] = status
-            return await self.set_cache(f"job:{job_id}", job, 3600)
-        return False
+        return await self._store_job_progress(job_id, progress, "", status, "")
+        
+    async def _store_job_progress(self, job_id: str, progress: int, message: str, status: Optional[str], channel: str) -> bool:
+        stored = await self.report_progress_script(
+            keys=[f"job:{job_id}", f"job:{job_id}:progress"],
+            args=[progress, message, datetime.utcnow().isoformat(), status or "", 3600, channel, job_id]
+        )
+        return bool(stored)
+        
+    async def report_job_progress(
+        self,
+        job_id: str,
+        progress: int,
+        message: str,
+        status: str = None,
+        channel: str = "job_updates",
+        min_delta: int = 5
+    ) -> bool:
+        """Store job progress and publish it atomically, in a single round-trip.
+        
+        Updates that move progress by less than `min_delta` are skipped, unless
+        they change the status or finish the job.
+        """
+        last = self.last_reported_progress.get(job_id)
+        if status is None and 0 <= progress < 100 and last is not None and abs(progress - last) < min_delta:
+            return False
+        
+        stored = await self._store_job_progress(job_id, progress, message, status, channel)
+        
+        if progress >= 100 or progress < 0 or not stored:
+            self.last_reported_progress.pop(job_id)
+        else:
+            self.last_reported_progress.set(job_id, progress)
+        return stored
         
     async def complete_generation_job(self, job_id: str, result: Dict[str, Any]) -> bool:
         """Mark job as completed"""
@@ -151,31 +255,24 @@ class RedisService:
                 "result": result
             })
             await self.redis_client.decrby("metric:active_generations", 1)
+            # The final state lives in the job itself; drop the reported progress
+            await self.redis_client.delete(f"job:{job_id}:progress")
             return await self.set_cache(f"job:{job_id}", job, 3600)
         return False
         
     # System Metrics
     async def get_system_metrics(self) -> Dict[str, Any]:
         """Get comprehensive system metrics"""
-        metrics = {}
         metric_keys = await self.redis_client.keys("metric:*")
-        
-        for key in metric_keys:
-            metric_name = key.split(":", 1)[1]
-            value = await self.get_metric(metric_name)
-            metrics[metric_name] = value
-            
-        return metrics
+        values = await self.get_many(metric_keys)
+        return {key.split(":", 1)[1]: value for key, value in zip(metric_keys, values)}
         
     async def get_performance_metrics(self) -> Dict[str, Any]:
         """Get performance metrics"""
+        values = await self.get_many([f"metric:{name}" for name in PERFORMANCE_METRIC_DEFAULTS])
         return {
-            "avg_generation_time": await self.get_metric("avg_generation_time") or 0,
-            "success_rate": await self.get_metric("success_rate") or 100,
-            "total_generations": await self.get_metric("total_generations") or 0,
-            "total_datasets": await self.get_metric("total_datasets") or 0,
-            "cpu_usage": await self.get_metric("cpu_usage") or 0,
-            "memory_usage": await self.get_metric("memory_usage") or 0
+            name: value or default
+            for (name, default), value in zip(PERFORMANCE_METRIC_DEFAULTS.items(), values)
         }
         
     # Pub/Sub for Real-time Updates
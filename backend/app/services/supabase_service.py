@@ -1,5 +1,8 @@
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SupabaseService:
     def __init__(self):
@@ -9,7 +12,7 @@ class SupabaseService:
         """Initialize Supabase connection"""
         # TODO: Initialize actual Supabase client
         self.initialized = True
-        print("✅ Supabase service initialized (mock)")
+        logger.info("✅ Supabase service initialized (mock)")
         
     async def health_check(self) -> bool:
         """Check Supabase connection health"""
@@ -29,15 +32,15 @@ class SupabaseService:
         
     async def create_generation_job(self, job_id: str, user_id: str, config: Dict[str, Any]):
         """Create new generation job"""
-        print(f"Creating job {job_id} for user {user_id}")
+        logger.info("Creating job %s for user %s", job_id, user_id)
         return True
         
     async def complete_generation_job(self, job_id: str, result: Dict[str, Any]):
         """Mark job as completed"""
-        print(f"Completing job {job_id}")
+        logger.info("Completing job %s", job_id)
         return True
         
     async def fail_generation_job(self, job_id: str, error: str):
         """Mark job as failed"""
-        print(f"Failing job {job_id}: {error}")
+        logger.error("Failing job %s: %s", job_id, error)
         return True
\ No newline at end of file
@@ -3,9 +3,12 @@ from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import json
+import logging
 
 from ..config import settings
 
+logger = logging.getLogger(__name__)
+
 class VectorService:
     def __init__(self):
         self.pinecone_client = None
@@ -28,7 +31,7 @@ class VectorService:
             )
             
         self.index = pinecone.Index(settings.pinecone_index_name)
-        print("✅ Pinecone vector database connected")
+        logger.info("✅ Pinecone vector database connected")
         
     def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for texts"""
@@ -81,7 +84,7 @@ class VectorService:
             return True
             
         except Exception as e:
-            print(f"Error storing embeddings: {e}")
+            logger.error("❌ Error storing embeddings: %s", e)
             return False
             
     async def find_similar_datasets(
@@ -124,7 +127,7 @@ class VectorService:
             return similar_datasets
             
         except Exception as e:
-            print(f"Error finding similar datasets: {e}")
+            logger.error("❌ Error finding similar datasets: %s", e)
             return []
             
     async def store_domain_patterns(
@@ -151,7 +154,7 @@ class VectorService:
             return True
             
         except Exception as e:
-            print(f"Error storing domain patterns: {e}")
+            logger.error("❌ Error storing domain patterns: %s", e)
             return False
             
     async def get_cross_domain_insights(
@@ -187,7 +190,7 @@ class VectorService:
             return insights
             
         except Exception as e:
-            print(f"Error getting cross-domain insights: {e}")
+            logger.error("❌ Error getting cross-domain insights: %s", e)
             return []
             
     async def cleanup_dataset_embeddings(self, dataset_id: str) -> bool:
@@ -209,5 +212,5 @@ class VectorService:
             return True
             
         except Exception as e:
-            print(f"Error cleaning up embeddings: {e}")
+            logger.error("❌ Error cleaning up embeddings: %s", e)
             return False
\ No newline at end of file
@@ -1,89 +1,194 @@
 from fastapi import WebSocket
-from typing import Dict, List
-import json
+from typing import Dict, List, Optional, Set, Union
+import orjson
+import msgspec
 import asyncio
 import logging
+import time
+
+from ..models.websocket import MSGPACK_SUBPROTOCOL, msgpack_encoder
 
 logger = logging.getLogger(__name__)
 
+# Messages buffered per client before it is considered too slow and dropped
+SEND_QUEUE_SIZE = 256
+
+# How long a batching client's writer waits to collect messages into one frame
+BATCH_FLUSH_INTERVAL = 0.05
+
+# Update payloads may carry NumPy values or non-string keys from the analysis agents
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# A replaced connection closes normally so its client doesn't reconnect over its
+# replacement; a dropped slow client is told to try again later and may reconnect
+REPLACED_CLOSE_CODE = 1000
+SLOW_CLIENT_CLOSE_CODE = 1013
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # Each client has its own outbound queue drained by a writer task,
+        # so a slow client never holds up sends to the others
+        self.send_queues: Dict[str, asyncio.Queue] = {}
+        self.writer_tasks: Dict[str, asyncio.Task] = {}
+        # Clients on the msgpack subprotocol; their queues hold packed bytes instead of JSON text
+        self.binary_clients: Set[str] = set()
+        # Background closes of replaced or dropped sockets, referenced until they finish
+        self.closing_tasks: Set[asyncio.Task] = set()
         
-    async def connect(self, websocket: WebSocket, client_id: str):
+    async def connect(self, websocket: WebSocket, client_id: str, subprotocol: Optional[str] = None,
+                      batch: bool = False):
         """Accept and store WebSocket connection"""
-        await websocket.accept()
+        await websocket.accept(subprotocol=subprotocol)
+        # A reconnect under the same id replaces the old connection, its writer and its socket
+        previous = self.active_connections.get(client_id)
+        if previous is not None:
+            self.disconnect(client_id, previous)
+            self._close(previous, REPLACED_CLOSE_CODE, "Replaced by a newer connection")
+        queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        binary = subprotocol == MSGPACK_SUBPROTOCOL
         self.active_connections[client_id] = websocket
-        logger.info(f"🔌 WebSocket connected: {client_id}")
-        
-        await self.send_personal_message(
-            json.dumps({
-                "type": "connection_established",
-                "client_id": client_id,
-                "message": "Connected to DataGenesis AI",
-                "timestamp": asyncio.get_event_loop().time()
-            }),
-            client_id
+        self.send_queues[client_id] = queue
+        if binary:
+            self.binary_clients.add(client_id)
+        self.writer_tasks[client_id] = asyncio.create_task(
+            self._writer(client_id, websocket, queue, binary=binary, batch=batch)
         )
+        logger.info("🔌 WebSocket connected: %s", client_id)
         
-    def disconnect(self, client_id: str):
-        """Remove WebSocket connection"""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            logger.info(f"🔌 WebSocket disconnected: {client_id}")
+        greeting = {
+            "type": "connection_established",
+            "client_id": client_id,
+            "message": "Connected to DataGenesis AI",
+            "timestamp": time.monotonic()
+        }
+        # Encoded straight into the client's format, skipping send_personal_message's JSON round trip
+        self._enqueue(msgpack_encoder.encode(greeting) if binary else orjson.dumps(greeting).decode(), client_id)
+        
+    def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        """Remove WebSocket connection.
+        
+        With `websocket`, only if it is still the client's current connection, so a
+        superseded socket closing late can't remove the connection that replaced it.
+        """
+        current = self.active_connections.get(client_id)
+        if current is None or (websocket is not None and current is not websocket):
+            return
+        del self.active_connections[client_id]
+        self.send_queues.pop(client_id, None)
+        self.binary_clients.discard(client_id)
+        writer = self.writer_tasks.pop(client_id, None)
+        if writer and writer is not asyncio.current_task():
+            writer.cancel()
+        logger.info("🔌 WebSocket disconnected: %s", client_id)
             
-    async def send_personal_message(self, message: str, client_id: str):
-        """Send message to specific client"""
-        if client_id in self.active_connections:
+    async def _writer(self, client_id: str, websocket: WebSocket, queue: asyncio.Queue,
+                      binary: bool = False, batch: bool = False):
+        """Drain a client's send queue onto its socket.
+        
+        Text clients' queues hold JSON strings, msgpack clients' hold packed bytes.
+        Batching clients get everything queued within BATCH_FLUSH_INTERVAL in one
+        {"type": "batch", "messages": [...]} frame.
+        """
+        while True:
+            message = await queue.get()
+            if batch:
+                await asyncio.sleep(BATCH_FLUSH_INTERVAL)
+                messages = [message]
+                while not queue.empty():
+                    messages.append(queue.get_nowait())
+                # Messages are already encoded, so the batch frame is assembled without re-encoding them
+                if len(messages) > 1 and binary:
+                    message = msgpack_encoder.encode(
+                        {"type": "batch", "messages": [msgspec.Raw(m) for m in messages]}
+                    )
+                elif len(messages) > 1:
+                    message = '{"type":"batch","messages":[' + ",".join(messages) + ']}'
             try:
-                await self.active_connections[client_id].send_text(message)
+                if binary:
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_text(message)
             except Exception as e:
-                logger.error(f"❌ Failed to send message to {client_id}: {e}")
-                # Connection might be closed, remove it
-                self.disconnect(client_id)
+                logger.error("❌ Failed to send message to %s: %s", client_id, e)
+                # Connection might be closed, remove it (unless it was already replaced)
+                self.disconnect(client_id, websocket)
+                return
+    
+    def _close(self, websocket: WebSocket, code: int, reason: str):
+        """Close a socket in the background; a backed-up client may take a while to accept the close frame"""
+        task = asyncio.create_task(self._close_quietly(websocket, code, reason))
+        self.closing_tasks.add(task)
+        task.add_done_callback(self.closing_tasks.discard)
+    
+    async def _close_quietly(self, websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception as e:
+            # Already closed by the client or the server
+            logger.debug("🔌 WebSocket close skipped: %s", e)
+            
+    def _enqueue(self, message: Union[str, bytes], client_id: str) -> bool:
+        """Queue a message for a client, dropping clients that have fallen too far behind"""
+        queue = self.send_queues.get(client_id)
+        if queue is None:
+            return False
+        try:
+            queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("⚠️ Dropping slow WebSocket client %s: send queue full", client_id)
+            websocket = self.active_connections.get(client_id)
+            self.disconnect(client_id)
+            if websocket is not None:
+                self._close(websocket, SLOW_CLIENT_CLOSE_CODE, "Send queue full")
+            return False
+            
+    async def send_personal_message(self, message: str, client_id: str):
+        """Send message to specific client"""
+        if client_id in self.binary_clients:
+            self._enqueue(msgpack_encoder.encode(msgspec.json.decode(message)), client_id)
+        else:
+            self._enqueue(message, client_id)
                 
     async def broadcast(self, message: str):
         """Broadcast message to all connected clients"""
         if not self.active_connections:
             return
-            
-        disconnected = []
         
-        for client_id, connection in self.active_connections.items():
-            try:
-                await connection.send_text(message)
-                logger.debug(f"📡 Broadcast sent to {client_id}")
-            except Exception as e:
-                logger.error(f"❌ Failed to broadcast to {client_id}: {e}")
-                disconnected.append(client_id)
-                
-        # Clean up disconnected clients
-        for client_id in disconnected:
-            self.disconnect(client_id)
+        # Packed at most once per broadcast, however many msgpack clients are connected
+        packed = None
+        if self.binary_clients:
+            packed = msgpack_encoder.encode(msgspec.json.decode(message))
+            
+        # Enqueueing never waits on a socket, so one slow client can't stall the rest
+        for client_id in list(self.send_queues):
+            if self._enqueue(packed if client_id in self.binary_clients else message, client_id):
+                logger.debug("📡 Broadcast queued for %s", client_id)
             
     async def send_generation_update(self, job_id: str, update: Dict):
         """Send generation progress update to all clients"""
-        message = json.dumps({
+        message = orjson.dumps({
             "type": "generation_progress",
             "job_id": job_id,
             "data": update
-        })
+        }, option=ORJSON_OPTIONS).decode()
         await self.broadcast(message)
         
     async def send_agent_status(self, agent_updates: Dict):
         """Send agent status updates"""
-        message = json.dumps({
+        message = orjson.dumps({
             "type": "agent_status",
             "data": agent_updates
-        })
+        }, option=ORJSON_OPTIONS).decode()
         await self.broadcast(message)
         
     async def send_system_alert(self, alert: Dict):
         """Send system-wide alerts"""
-        message = json.dumps({
+        message = orjson.dumps({
             "type": "system_alert",
             "data": alert
-        })
+        }, option=ORJSON_OPTIONS).decode()
         await self.broadcast(message)
         
     def get_connection_count(self) -> int:
@@ -0,0 +1,76 @@
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+def ttl_cache(seconds: float, key: Optional[Callable[..., Any]] = None):
+    """Cache an async function's result for `seconds`.
+    
+    Concurrent misses for the same key share a single call (single-flight).
+    Without a `key` function every call shares one entry, which suits
+    endpoints whose response does not depend on their arguments.
+    Calling with `no_cache=True` forces a refresh.
+    """
+    def decorator(func):
+        entries: Dict[Any, Tuple[float, Any]] = {}
+        locks: Dict[Any, asyncio.Lock] = {}
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else None
+            refresh = bool(kwargs.get("no_cache"))
+            
+            entry = entries.get(cache_key)
+            if entry and not refresh and entry[0] > time.monotonic():
+                return entry[1]
+            
+            async with locks.setdefault(cache_key, asyncio.Lock()):
+                # Another caller may have refreshed the entry while we waited
+                entry = entries.get(cache_key)
+                if entry and not refresh and entry[0] > time.monotonic():
+                    return entry[1]
+                
+                result = await func(*args, **kwargs)
+                entries[cache_key] = (time.monotonic() + seconds, result)
+                return result
+        
+        wrapper.cache_clear = entries.clear
+        return wrapper
+    return decorator
+
+class TTLCache:
+    """Bounded in-process cache whose entries expire after `seconds`; least recently used go first"""
+    
+    def __init__(self, maxsize: int, seconds: float):
+        self.maxsize = maxsize
+        self.seconds = seconds
+        self.entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def set(self, key: Hashable, value: Any):
+        self.entries[key] = (time.monotonic() + self.seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+    
+    def pop(self, key: Hashable):
+        self.entries.pop(key, None)
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
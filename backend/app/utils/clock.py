@@ -0,0 +1,17 @@
+import time
+from datetime import datetime, timezone
+from typing import Tuple
+
+_cached: Tuple[int, str] = (0, "")
+
+def utc_now_iso() -> str:
+    """Current UTC time as an ISO-8601 string at one-second resolution.
+    
+    The formatted string is reused until the wall-clock second changes, so hot
+    endpoints don't build a datetime and format it on every call.
+    """
+    global _cached
+    second = int(time.time())
+    if _cached[0] != second:
+        _cached = (second, datetime.fromtimestamp(second, timezone.utc).isoformat())
+    return _cached[1]
@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+def digest(text: str) -> str:
+    """Short stable hash of `text`, for use as a dedup key"""
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+class Coalescer:
+    """Bound concurrent calls to an external service and share identical in-flight ones.
+    
+    Calls made with the same key while one is already running await that call's
+    result instead of starting another (single-flight). Every call, keyed or not,
+    runs under a semaphore of size `limit`.
+    """
+    
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.inflight: Dict[Hashable, asyncio.Future] = {}
+    
+    async def run(self, key: Optional[Hashable], coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        if key is None:
+            return await self._bounded(coro_factory)
+        
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._bounded(coro_factory))
+            self.inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        
+        # Shield so one cancelled waiter doesn't cancel the call for everyone else
+        return await asyncio.shield(future)
+    
+    async def _bounded(self, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        async with self.semaphore:
+            return await coro_factory()
+    
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self.inflight.get(key) is future:
+            del self.inflight[key]
+        # Mark the exception retrieved in case every waiter was cancelled
+        if not future.cancelled():
+            future.exception()
+
+class TokenBucket:
+    """Async token bucket refilling `rate` tokens every `period` seconds, bursting up to `rate`.
+    
+    Waiters are served in arrival order. `consume` charges tokens after the fact
+    (e.g. LLM tokens known only from the response) and may leave the bucket in
+    debt, which later `acquire` calls wait off.
+    """
+    
+    def __init__(self, rate: float, period: float = 60.0):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+    
+    async def acquire(self, amount: float = 1.0):
+        async with self.lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.fill_rate)
+                self._refill()
+            self.tokens -= amount
+    
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= amount
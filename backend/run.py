@@ -9,6 +9,7 @@ import sys
 import time
 import platform
 import signal
+from importlib.util import find_spec
 from pathlib import Path
 
 class Colors:
@@ -52,13 +53,9 @@ def check_dependencies():
     print(f"{Colors.BOLD}Checking dependencies...{Colors.ENDC}")
     
     required_packages = ['fastapi', 'uvicorn']
-    missing_packages = []
-    
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec only locates the packages; importing them here would load
+    # their whole module graphs before the server even starts
+    missing_packages = [package for package in required_packages if find_spec(package) is None]
     
     if missing_packages:
         print(f"{Colors.FAIL}✗ Missing packages: {', '.join(missing_packages)}{Colors.ENDC}")
@@ -92,7 +89,14 @@ def start_fastapi_server():
             port=8000,
             reload=True,
             log_level="info",
-            access_log=True
+            access_log=True,
+            # uvloop has no Windows build; httptools parses HTTP in C everywhere
+            loop="asyncio" if platform.system() == "Windows" else "uvloop",
+            http="httptools",
+            # Deflate would re-compress every broadcast once per connection
+            ws_per_message_deflate=False,
+            limit_concurrency=1000,
+            backlog=2048
         )
         
     except ImportError:
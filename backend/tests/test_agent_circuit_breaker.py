@@ -0,0 +1,39 @@
+import asyncio
+
+from app.services.agent_orchestrator import BREAKER_FAILURE_THRESHOLD, PrivacyAgent
+from app.services.gemini_service import GeminiService
+
+def failing_service():
+    """Initialized GeminiService whose model call always fails"""
+    service = GeminiService()
+    service.is_initialized = True
+    service.calls = 0
+    
+    async def fail(prompt, coalesce=False, json_mode=False):
+        service.calls += 1
+        raise RuntimeError("Gemini unavailable")
+    
+    service._generate_content_async = fail
+    return service
+
+def test_gemini_failures_open_the_breaker():
+    service = failing_service()
+    agent = PrivacyAgent()
+    asyncio.run(agent.initialize(service))
+    
+    async def run():
+        for _ in range(BREAKER_FAILURE_THRESHOLD + 2):
+            result = await agent.assess_privacy([{"name": "x"}], {}, {"domain": "general"})
+            assert result["privacy_score"] == 85
+    asyncio.run(run())
+    
+    # One service call per failed assessment until the breaker opens, none after
+    assert agent.consecutive_failures == BREAKER_FAILURE_THRESHOLD
+    assert service.calls == BREAKER_FAILURE_THRESHOLD
+
+def test_fallback_result_without_raise_on_error():
+    service = failing_service()
+    
+    result = asyncio.run(service.assess_privacy_risks([{"name": "x"}], {}))
+    
+    assert result["privacy_score"] == 85
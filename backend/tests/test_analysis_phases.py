@@ -0,0 +1,36 @@
+import asyncio
+
+from app.services.agent_orchestrator import AgentOrchestrator, DomainExpertAgent, PrivacyAgent
+from app.services.gemini_service import GeminiService
+
+def test_detected_domain_overlays_without_rerunning_agents(monkeypatch):
+    orchestrator = AgentOrchestrator(GeminiService())
+    calls = []
+    
+    async def detect_healthcare(self, data, schema, config, description):
+        return {"domain": "healthcare"}
+    
+    async def assess_privacy(self, data, config, domain_context):
+        calls.append(domain_context)
+        return {"privacy_score": 85}
+    
+    monkeypatch.setattr(DomainExpertAgent, "analyze_data", detect_healthcare)
+    monkeypatch.setattr(PrivacyAgent, "assess_privacy", assess_privacy)
+    
+    async def send_update(step, progress, message):
+        pass
+    
+    async def run():
+        await orchestrator.initialize()
+        context = {"source_data": [{"age": 1, "score": 2}], "schema": {}, "config": {}, "description": ""}
+        await orchestrator._run_phases(orchestrator._analysis_phases(), context, send_update, start=10, end=75)
+        return context
+    context = asyncio.run(run())
+    
+    # The agent ran once; the detected domain's overlays were applied to its result
+    assert len(calls) == 1
+    assert context["privacy_assessment"]["privacy_score"] == 95
+    assert context["privacy_assessment"]["compliance_requirements"] == ["HIPAA", "GDPR"]
+    agents = orchestrator.agents
+    assert context["bias_analysis"]["domain_specific_checks"] == agents["bias_detector"]._get_domain_bias_checks("healthcare")
+    assert context["relationship_analysis"]["domain_relationships"] == agents["relationship_agent"]._get_domain_relationships("healthcare")
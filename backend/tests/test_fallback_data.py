@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import numpy as np
+
+from app.services.agent_orchestrator import AgentOrchestrator
+from app.services.gemini_service import VECTORIZED_FALLBACK_THRESHOLD, GeminiService
+
+# Array-type field whose examples are equal-length lists
+SCHEMA = {
+    "tags": {"type": "array", "examples": [["a", "b"], ["c", "d"], ["e", "f"]]},
+    "score": {"type": "number", "examples": [1, 2, 3]},
+}
+
+ROW_COUNT = VECTORIZED_FALLBACK_THRESHOLD + 5
+
+# One field per name/type branch of the generated (example-free) fallback values
+GENERATED_FIELDS = {
+    "user_id": {"type": "string"},
+    "patient_code": {"type": "string"},
+    "full_name": {"type": "string"},
+    "email": {"type": "string"},
+    "age": {"type": "number"},
+    "amount": {"type": "number"},
+    "quantity": {"type": "number", "constraints": {"min": 5, "max": 500}},
+    "active": {"type": "boolean"},
+    "created": {"type": "date"},
+    "notes": {"type": "string"},
+}
+
+# Whole-second and fractional base dates: isoformat() drops zero microseconds
+BASE_DATES = (datetime(2024, 1, 1, 12, 0, 0), datetime(2024, 1, 1, 12, 0, 0, 250))
+
+INDICES = (0, 1, 2, 7, ROW_COUNT - 1)
+
+def test_orchestrator_vectorized_fallback_keeps_list_examples():
+    orchestrator = AgentOrchestrator(GeminiService())
+    rows = orchestrator._generate_intelligent_fallback_data(SCHEMA, ROW_COUNT)
+    
+    assert len(rows) == ROW_COUNT
+    assert rows[0]["tags"] == ["a", "b"]
+    assert rows[4]["tags"] == ["c", "d"]
+    assert rows[4]["score"] == 2
+
+def test_orchestrator_vectorized_fallback_matches_scalar_path():
+    orchestrator = AgentOrchestrator(GeminiService())
+    vectorized = orchestrator._generate_intelligent_fallback_data(SCHEMA, ROW_COUNT)
+    
+    for i in (0, 1, 2, ROW_COUNT - 1):
+        for field_name, field_info in SCHEMA.items():
+            expected = orchestrator._generate_realistic_fallback_value(field_info, field_name, i)
+            assert vectorized[i][field_name] == expected
+
+def test_gemini_vectorized_fallback_keeps_list_examples():
+    rows = GeminiService()._generate_intelligent_fallback_data(SCHEMA, ROW_COUNT)
+    
+    assert len(rows) == ROW_COUNT
+    assert rows[2]["tags"] == ["e", "f"]
+    assert rows[3]["tags"] == ["a", "b"]
+
+def test_orchestrator_fallback_columns_match_scalar_values_per_type():
+    orchestrator = AgentOrchestrator(GeminiService())
+    index = np.arange(ROW_COUNT)
+    
+    for base_date in BASE_DATES:
+        for field_name, field_info in GENERATED_FIELDS.items():
+            column = orchestrator._generate_fallback_column(
+                field_info, field_name, index, np.datetime64(base_date, 'us')
+            )
+            for i in INDICES:
+                expected = orchestrator._generate_realistic_fallback_value(field_info, field_name, i, base_date)
+                assert column[i] == expected, (field_name, i)
+
+def test_gemini_fallback_columns_match_scalar_values_per_type():
+    service = GeminiService()
+    index = np.arange(ROW_COUNT)
+    
+    for base_date in BASE_DATES:
+        for field_name, field_info in GENERATED_FIELDS.items():
+            column = service._generate_realistic_column(field_info, field_name, index, base_date)
+            for i in INDICES:
+                expected = service._generate_realistic_value(field_info, field_name, i, base_date)
+                assert column[i] == expected, (field_name, i)
+
+def test_fallback_schema_mutation_does_not_leak_into_later_requests():
+    service = GeminiService()
+    first = service._generate_intelligent_fallback_schema("patient records", "healthcare")
+    first["schema"]["age"]["constraints"]["min"] = 0
+    first["schema"]["gender"]["examples"].append("Other")
+    
+    second = service._generate_intelligent_fallback_schema("patient records", "healthcare")
+    
+    assert second["schema"]["age"]["constraints"]["min"] == 18
+    assert second["schema"]["gender"]["examples"] == ["Male", "Female"]
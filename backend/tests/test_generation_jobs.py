@@ -0,0 +1,19 @@
+import time
+
+from app import main
+from app.config import settings
+
+def finished_job(age: float, rows: int):
+    return {"status": "completed", "result": {"data": [{}] * rows}, "finished_at": time.monotonic() - age}
+
+def test_prune_drops_expired_and_oldest_jobs_beyond_the_row_budget(monkeypatch):
+    monkeypatch.setattr(main, "generation_jobs", {
+        "expired": finished_job(settings.background_job_ttl + 1, 1),
+        "oldest": finished_job(3, settings.background_job_max_rows),
+        "newest": finished_job(1, 1),
+        "running": {"status": "running"}
+    })
+    
+    main._prune_generation_jobs()
+    
+    assert set(main.generation_jobs) == {"newest", "running"}
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.services.gemini_service import GeminiService
+
+def test_no_cache_bypasses_the_cached_health_check():
+    service = GeminiService()
+    
+    async def run():
+        first = await service.health_check()
+        return first, await service.health_check(), await service.health_check(no_cache=True)
+    first, cached, refreshed = asyncio.run(run())
+    
+    assert cached is first
+    assert refreshed is not first
+
+def test_health_probe_is_not_retried():
+    service = GeminiService()
+    service.is_initialized = True
+    calls = []
+    
+    class TimingOutModel:
+        async def generate_content_async(self, prompt, generation_config=None):
+            calls.append(prompt)
+            raise asyncio.TimeoutError()
+    
+    service.model = TimingOutModel()
+    status = asyncio.run(service.health_check(no_cache=True))
+    
+    assert status["status"] == "error"
+    assert len(calls) == 1
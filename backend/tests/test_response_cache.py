@@ -0,0 +1,27 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.gemini_service import GeminiService
+
+def test_unparseable_response_is_not_served_from_cache():
+    service = GeminiService()
+    service.is_initialized = True
+    service.model = object()
+    replies = ['{"truncated": ', '{"domain": "healthcare"}']
+    
+    async def call_model(prompt, json_mode=False, max_attempts=None, timeout=None):
+        return SimpleNamespace(text=replies.pop(0))
+    
+    service._call_model = call_model
+    
+    async def run():
+        failed = await service.analyze_data_comprehensive([{"age": 1}], {})
+        retried = await service.analyze_data_comprehensive([{"age": 1}], {})
+        cached = await service.analyze_data_comprehensive([{"age": 1}], {})
+        return failed, retried, cached
+    failed, retried, cached = asyncio.run(run())
+    
+    assert failed.get("domain") != "healthcare"
+    assert retried["domain"] == "healthcare"
+    assert cached["domain"] == "healthcare"
+    assert replies == []
@@ -0,0 +1,56 @@
+import asyncio
+
+from app.services.gemini_service import GeminiService
+
+SCHEMA = {"status": {"type": "string", "examples": ["open", "closed"]}}
+
+def make_service(batches):
+    """GeminiService whose batch calls return `batches[batch_num]`, or fail when it is None"""
+    service = GeminiService()
+    service.is_initialized = True
+    
+    async def fake_single_batch(schema, config, description, batch_num, total_batches, schema_json=None):
+        if batch_num >= len(batches) or batches[batch_num] is None:
+            raise RuntimeError("batch failed")
+        return batches[batch_num][:config["rowCount"]]
+    
+    service._generate_single_batch = fake_single_batch
+    return service
+
+def collect(service, row_count):
+    async def run():
+        return [
+            row
+            async for rows in service.stream_synthetic_data(SCHEMA, {"rowCount": row_count})
+            for row in rows
+        ]
+    return asyncio.run(run())
+
+def test_repeats_within_a_batch_are_kept():
+    batch = [{"status": "open"}] * 20 + [{"status": "closed"}] * 5
+    rows = collect(make_service([batch]), 25)
+    
+    assert len(rows) == 25
+
+def test_rows_repeated_across_batches_are_replaced_by_a_top_up_batch():
+    first = [{"status": "open", "n": i} for i in range(25)]
+    second = [{"status": "open", "n": i} for i in range(20, 45)]
+    top_up = [{"status": "open", "n": i} for i in range(45, 50)]
+    rows = collect(make_service([first, second, top_up]), 50)
+    
+    assert len(rows) == 50
+    assert sorted(row["n"] for row in rows) == list(range(50))
+
+def test_failed_top_up_is_filled_with_fallback_rows_that_repeat_nothing():
+    first = [{"status": "open", "n": i} for i in range(25)]
+    second = [{"status": "open", "n": i} for i in range(20, 45)]
+    rows = collect(make_service([first, second]), 50)
+    
+    assert len(rows) == 50
+    model_rows = [row for row in rows if "n" in row]
+    assert sorted(row["n"] for row in model_rows) == list(range(45))
+
+def test_failed_batch_keeps_all_its_fallback_rows():
+    rows = collect(make_service([None]), 25)
+    
+    assert len(rows) == 25